@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# NumPy helpers that work on whole boards (or stacks of boards) at once instead of cell by cell.
+
+import math, time
+import numpy as np
+import SudokuStarter
+
+
+def boards_to_array(sudoku_boards):
+    """Stacks the CurrentGameBoard of a list of SudokuBoards of the same size into a B x N x N array."""
+    return np.array([board.CurrentGameBoard for board in sudoku_boards], dtype=np.int32)
+
+
+def box_view(boards):
+    """Takes a B x N x N array and returns a B x N x N array where [b][k] is the k-th box of board b
+    (boxes are numbered left to right, top to bottom, like rows)."""
+    B, N = boards.shape[0], boards.shape[1]
+    s = int(math.sqrt(N))
+    return boards.reshape(B, s, s, s, s).transpose(0, 1, 3, 2, 4).reshape(B, N, N)
+
+
+def validate_boards(boards):
+    """Takes a B x N x N array of filled boards and checks every row, column and box of every board at once.
+    Returns (ok, violations): ok is a length B boolean mask, violations maps the index of every failing board
+    to its first violation as a tuple (kind, index), where kind is 'cell' (index is (row, col) of an empty or
+    out-of-range value), 'row', 'col' or 'box' (index is the row/column/box number, zero-indexed)."""
+    boards = np.asarray(boards)
+    if boards.ndim == 2:
+        boards = boards[np.newaxis]
+    B, N = boards.shape[0], boards.shape[1]
+
+    badCells = (boards < 1) | (boards > N)
+    if N <= 62:
+        # a unit is valid iff OR-ing the bit of every value in it sets exactly bits 1..N
+        full = (1 << (N+1)) - 2
+        bits = np.left_shift(np.int64(1), np.clip(boards, 0, N+1))
+        badRows = np.bitwise_or.reduce(bits, axis=2) != full
+        badCols = np.bitwise_or.reduce(bits, axis=1) != full
+        badBoxes = np.bitwise_or.reduce(box_view(bits), axis=2) != full
+    else:
+        # too many values for a 64 bit mask: a unit is valid iff its sorted values are exactly 1..N
+        expected = np.arange(1, N+1)
+        badRows = (np.sort(boards, axis=2) != expected).any(axis=2)
+        badCols = (np.sort(boards, axis=1) != expected[:, np.newaxis]).any(axis=1)
+        badBoxes = (np.sort(box_view(boards), axis=2) != expected).any(axis=2)
+
+    badCellsAny = badCells.reshape(B, -1).any(axis=1)
+    ok = ~(badCellsAny | badRows.any(axis=1) | badCols.any(axis=1) | badBoxes.any(axis=1))
+
+    # only the failing boards need their first violation located, so this loop is over failures only
+    violations = {}
+    for b in np.flatnonzero(~ok):
+        if badCellsAny[b]:
+            violations[b] = ('cell', divmod(int(badCells[b].argmax()), N))
+        elif badRows[b].any():
+            violations[b] = ('row', int(badRows[b].argmax()))
+        elif badCols[b].any():
+            violations[b] = ('col', int(badCols[b].argmax()))
+        else:
+            violations[b] = ('box', int(badBoxes[b].argmax()))
+    return ok, violations
+
+
+
+class ArrayBoard(object):
+    """A SudokuBoard whose state lives in NumPy arrays: CurrentGameBoard is an N x N int array and the
+    possible numbers of every tile are an N x N x N boolean candidate tensor ([row][col][value-1]).
+    It has the same attributes and methods backTrack uses, so it can be passed to solve() directly."""
+
+    def __init__(self, size, board):
+        """the constructor for the ArrayBoard. Values already on the board are removed from the candidates
+        of their peers, but no further deduction is done (use propagate() for that)."""
+        self.BoardSize = size
+        self.squareSize = int(math.sqrt(self.BoardSize))
+        self.CurrentGameBoard = np.array(board, dtype=np.int32).reshape(size, size)
+        self.Candidates = np.ones((size, size, size), dtype=bool)
+        self._eliminate()
+        self._attach()
+
+    def _attach(self):
+        # PossibleNum is a read-only view of Candidates, so it always reflects the current state
+        self.PossibleNum = _PossibleNumView(self.Candidates)
+        self.BoardConstraintsNum = _constraints_num(self.CurrentGameBoard)
+
+    def __deepcopy__(self, memo):
+        boardCopy = ArrayBoard.__new__(ArrayBoard)
+        boardCopy.BoardSize = self.BoardSize
+        boardCopy.squareSize = self.squareSize
+        boardCopy.CurrentGameBoard = self.CurrentGameBoard.copy()
+        boardCopy.Candidates = self.Candidates.copy()
+        boardCopy._attach()
+        return boardCopy
+
+    def set_value(self, row, col, value):
+        """Places value on the board and propagates naked and hidden singles over all units until nothing
+        changes. Returns false if the tile was occupied or the board became inconsistent."""
+        SudokuStarter.consistencyChecks += 1
+        if not self.CurrentGameBoard[row, col] == 0:
+            return False
+        self.CurrentGameBoard[row, col] = value
+        result = self.propagate()
+        self.BoardConstraintsNum = _constraints_num(self.CurrentGameBoard)
+        return result
+
+    def set_value_no_forward_checking(self, row, col, value):
+        """Places value on the board without touching the possible numbers of any other tile."""
+        if not self.CurrentGameBoard[row, col] == 0:
+            return False
+        self.CurrentGameBoard[row, col] = value
+        self.Candidates[row, col] = False
+        self.BoardConstraintsNum[row, col] = -1
+        return True
+
+    def removePossibleNum(self, row, col, value):
+        """Removes value from the candidates of a tile (if it's there), like SudokuBoard.removePossibleNum."""
+        self.Candidates[row, col, value-1] = False
+
+    def _eliminate(self):
+        """Removes every placed value from the candidates of its row, column and box. Returns false if a unit
+        holds a value twice or an empty tile is left without candidates."""
+        return bool(eliminate_boards(self.CurrentGameBoard[np.newaxis], self.Candidates[np.newaxis])[0])
+
+    def propagate(self):
+        """Runs elimination, naked single and hidden single detection on the whole board in rounds until a
+        fixpoint. Returns false if the board turns out to be inconsistent."""
+        return bool(propagate_boards(self.CurrentGameBoard[np.newaxis], self.Candidates[np.newaxis])[0])
+
+    def print_board(self):
+        """Prints the current game board. Leaves unassigned spots blank."""
+        SudokuStarter.SudokuBoard(self.BoardSize, self.CurrentGameBoard.tolist()).print_board()
+
+
+
+def _unit_views(placed):
+    """Takes a B x N x N x N boolean tensor ([board][row][col][value-1]) and returns its per-unit counts:
+    [board][row][value-1], [board][col][value-1] and [board][box][value-1]."""
+    B, N = placed.shape[0], placed.shape[1]
+    boxes = box_view(placed.transpose(0, 3, 1, 2).reshape(B*N, N, N)).reshape(B, N, N, N)
+    return (placed.sum(axis=2, dtype=np.int16), placed.sum(axis=1, dtype=np.int16),
+            boxes.sum(axis=3, dtype=np.int16).transpose(0, 2, 1))
+
+
+def eliminate_boards(grids, candidates):
+    """Takes a B x N x N array of boards and their B x N x N x N candidate tensors and removes every placed
+    value from the candidates of its row, column and box, in place. Returns a length B mask that is false for
+    boards where a unit holds a value twice or an empty tile is left without candidates."""
+    return _eliminate_units(grids, candidates)[0]
+
+
+def _eliminate_units(grids, candidates):
+    """eliminate_boards, also returning the per-unit counts of placed values it computed on the way."""
+    N = grids.shape[1]
+    placed = grids[:, :, :, np.newaxis] == np.arange(1, N+1)
+    rowHas, colHas, boxHas = _unit_views(placed)
+    ok = ~((rowHas > 1).any(axis=(1, 2)) | (colHas > 1).any(axis=(1, 2)) | (boxHas > 1).any(axis=(1, 2)))
+    candidates &= ~((rowHas > 0)[:, :, np.newaxis, :] | (colHas > 0)[:, np.newaxis, :, :]
+                    | (boxHas > 0)[:, _box_index(N)])
+    candidates[grids != 0] = False
+    ok &= ~((grids == 0) & ~candidates.any(axis=3)).any(axis=(1, 2))
+    return ok, rowHas, colHas, boxHas
+
+
+def _propagate_round(grids, candidates):
+    """One round of propagate_boards, in place. Returns (ok, changed) masks: changed boards had values placed."""
+    B, N = grids.shape[0], grids.shape[1]
+    s = int(math.sqrt(N))
+    ok, rowHas, colHas, boxHas = _eliminate_units(grids, candidates)
+    # a value that is neither placed nor possible anywhere in a unit means the unit can't be completed
+    rowCount, colCount, boxCount = _unit_views(candidates)
+    ok &= ~(((rowCount == 0) & (rowHas == 0)).any(axis=(1, 2)) | ((colCount == 0) & (colHas == 0)).any(axis=(1, 2))
+            | ((boxCount == 0) & (boxHas == 0)).any(axis=(1, 2)))
+    live = ok[:, np.newaxis, np.newaxis]
+
+    # naked singles: tiles with only one possible number
+    boards, rows, cols = np.nonzero(live & (grids == 0) & (candidates.sum(axis=3, dtype=np.int16) == 1))
+    vals = candidates[boards, rows, cols].argmax(axis=1)
+    # hidden singles: numbers that are possible in only one tile of a row/column/box
+    hBoards, hRows, hVals = np.nonzero(live & (rowCount == 1))
+    hCols = candidates.transpose(0, 1, 3, 2)[hBoards, hRows, hVals].argmax(axis=1)
+    vBoards, vCols, vVals = np.nonzero(live & (colCount == 1))
+    vRows = candidates.transpose(0, 2, 3, 1)[vBoards, vCols, vVals].argmax(axis=1)
+    bBoards, bBoxes, bVals = np.nonzero(live & (boxCount == 1))
+    boxCand = box_view(candidates[bBoards, :, :, bVals])
+    bTiles = boxCand[np.arange(len(bBoards)), bBoxes].argmax(axis=1)
+    bRows = (bBoxes // s) * s + bTiles // s
+    bCols = (bBoxes % s) * s + bTiles % s
+
+    boards = np.concatenate((boards, hBoards, vBoards, bBoards))
+    rows = np.concatenate((rows, hRows, vRows, bRows))
+    cols = np.concatenate((cols, hCols, vCols, bCols))
+    vals = np.concatenate((vals, hVals, vVals, bVals)) + 1
+    grids[boards, rows, cols] = vals
+    # two different singles forced into the same tile
+    ok[boards[grids[boards, rows, cols] != vals]] = False
+    changed = np.zeros(B, dtype=bool)
+    changed[boards] = True
+    return ok, changed
+
+
+def propagate_boards(grids, candidates):
+    """Runs elimination, naked single and hidden single detection on every board of a B x N x N stack at once,
+    in rounds until no board changes. Every round is a fixed number of array operations over the boards that
+    changed in the previous round, no matter how many tiles changed. Works in place and returns a length B mask
+    that is false for inconsistent boards (no more values are placed on those once the inconsistency is found)."""
+    ok = np.ones(len(grids), dtype=bool)
+    active = np.arange(len(grids))
+    while len(active):
+        if len(active) == len(grids):
+            activeOk, changed = _propagate_round(grids, candidates)
+        else:
+            activeGrids, activeCandidates = grids[active], candidates[active]
+            activeOk, changed = _propagate_round(activeGrids, activeCandidates)
+            grids[active], candidates[active] = activeGrids, activeCandidates
+        ok[active] = activeOk
+        active = active[activeOk & changed]
+    return ok
+
+
+class _PossibleNumView(object):
+    """Lets PossibleNum[row][col] return the list of possible numbers of a tile, like SudokuBoard.PossibleNum."""
+
+    def __init__(self, candidates):
+        self.candidates = candidates
+
+    def __getitem__(self, row):
+        return _PossibleNumRow(self.candidates[row])
+
+    def __len__(self):
+        return len(self.candidates)
+
+
+class _PossibleNumRow(object):
+
+    def __init__(self, candidates):
+        self.candidates = candidates
+
+    def __getitem__(self, col):
+        return (np.flatnonzero(self.candidates[col]) + 1).tolist()
+
+    def __len__(self):
+        return len(self.candidates)
+
+
+_boxIndexCache = {}
+_peerCache = {}
+
+
+def _box_index(size):
+    """N x N array holding the box number of every tile."""
+    if size not in _boxIndexCache:
+        s = int(math.sqrt(size))
+        rows, cols = np.indices((size, size))
+        _boxIndexCache[size] = (rows // s) * s + cols // s
+    return _boxIndexCache[size]
+
+
+def _peer_matrix(size):
+    """N^2 x N^2 matrix with a 1 where two tiles share a row, column or box (a tile is not its own peer)."""
+    if size not in _peerCache:
+        rows, cols = np.indices((size, size))
+        rows, cols, boxes = rows.ravel(), cols.ravel(), _box_index(size).ravel()
+        peers = ((rows[:, np.newaxis] == rows) | (cols[:, np.newaxis] == cols) | (boxes[:, np.newaxis] == boxes))
+        np.fill_diagonal(peers, False)
+        _peerCache[size] = peers.astype(np.int32)
+    return _peerCache[size]
+
+
+def _constraints_num(grid):
+    """The BoardConstraintsNum of a grid: the number of empty peers of every empty tile, -1 for filled tiles."""
+    size = len(grid)
+    empty = (grid == 0)
+    result = _peer_matrix(size).dot(empty.ravel().astype(np.int32)).reshape(size, size)
+    result[~empty] = -1
+    return result
+
+
+def to_sudoku_board(grid, candidates=None):
+    """Builds a regular SudokuBoard holding the given N x N grid and N x N x N candidate tensor (leave candidates
+    out for a full grid)."""
+    if candidates is None:
+        return SudokuStarter.filled_board(np.asarray(grid).tolist())
+    size = len(grid)
+    sudoku = SudokuStarter.SudokuBoard(size, np.asarray(grid).tolist())
+    values = range(1, size+1)
+    sudoku.PossibleNum = [[[value for value, possible in zip(values, cell) if possible] for cell in row]
+                          for row in np.asarray(candidates).tolist()]
+    sudoku.BoardConstraintsNum = _constraints_num(np.asarray(grid)).tolist()
+    sudoku.countPossibleNum()
+    return sudoku
+
+
+def read_sudoku_file(filename):
+    """Reads a sudoku text file into an N x N int array. Nothing is propagated."""
+    f = open(filename, 'r')
+    BoardSize = int(f.readline())
+    NumVals = int(f.readline())
+    board = np.zeros((BoardSize, BoardSize), dtype=np.int32)
+    for i in range(NumVals):
+        chars = f.readline().split()
+        board[int(chars[0])-1, int(chars[1])-1] = int(chars[2])
+    f.close()
+    return board
+
+
+def parse_file_array(filename):
+    """Parses a sudoku text file into an ArrayBoard. All the clues are placed first and then propagated together."""
+    board = read_sudoku_file(filename)
+    sudoku = ArrayBoard(len(board), board)
+    sudoku.propagate()
+    sudoku.BoardConstraintsNum = _constraints_num(sudoku.CurrentGameBoard)
+    return sudoku
+
+
+def init_array_board(file_name):
+    """Creates an ArrayBoard object initialized with values from a text file"""
+    return parse_file_array(file_name)
+
+
+def compare_validators(boards, repeat=3):
+    """Times validate_boards against calling is_complete once per board. Returns (vectorized, looped)
+    seconds per board."""
+    boards = np.asarray(boards)
+    sudokus = [SudokuStarter.SudokuBoard(boards.shape[1], board.tolist()) for board in boards]
+    vectorized = looped = float('inf')
+    for r in range(repeat):
+        start = time.time()
+        validate_boards(boards)
+        vectorized = min(vectorized, time.time()-start)
+        start = time.time()
+        for sudoku in sudokus:
+            SudokuStarter.is_complete(sudoku)
+        looped = min(looped, time.time()-start)
+    return vectorized/len(boards), looped/len(boards)
+
+
+if __name__ == '__main__':
+    import sys
+    fileName = sys.argv[1] if len(sys.argv) > 1 else "input_puzzles/easy/9_9.sudoku"
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    solution = SudokuStarter.solve(SudokuStarter.init_board(fileName))
+    boards = np.repeat(boards_to_array([solution]), copies, axis=0)
+    vectorized, looped = compare_validators(boards)
+    print "validate_boards: %.3g s/board, is_complete: %.3g s/board (%.0fx)" % (vectorized, looped, looped/vectorized)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Solves many puzzles of the same size together: constraint propagation runs on all of them at once as
+# array operations, and only the puzzles it doesn't finish are searched one by one with backTrack.
+
+import glob, os, sys, time
+import numpy as np
+import SudokuStarter, SudokuArray
+
+
+def load_boards(fileNames):
+    """Reads puzzle files of the same size into a B x N x N int array."""
+    return np.array([SudokuArray.read_sudoku_file(fileName) for fileName in fileNames])
+
+
+def split_boards(grids, candidates, owners):
+    """Branches every board of a stack on its tile with the fewest possible numbers (like MRV): returns the
+    grids and candidates of one child board per possible number, with the owners of their parents."""
+    B, N = grids.shape[0], grids.shape[1]
+    counts = candidates.sum(axis=3)
+    counts[grids != 0] = N+1
+    rows, cols = np.divmod(counts.reshape(B, -1).argmin(axis=1), N)
+    parents, values = np.nonzero(candidates[np.arange(B), rows, cols])
+    childGrids = grids[parents]
+    childGrids[np.arange(len(parents)), rows[parents], cols[parents]] = values+1
+    return childGrids, candidates[parents], owners[parents]
+
+
+def solve_batch(grids, forward_checking=True, MRV=True, MCV=False, LCV=True, splitRounds=3, maxFrontier=65536,
+                profile=False):
+    """Takes a B x N x N array of puzzles and returns a list with the solved SudokuBoard of every puzzle (False
+    for puzzles that cannot be solved), in the same order.
+    Propagation is done for the whole batch in lockstep. Puzzles it doesn't finish are then branched on one tile
+    at a time for up to splitRounds rounds, with all the child boards of all puzzles propagated together again
+    (as long as there are at most maxFrontier of them). Only what is still open after that is searched one
+    puzzle at a time with backTrack, which gets the heuristic arguments.
+    profile works like in solve(), adding the propagation, branching and conversion phases of the batch."""
+    if profile:
+        import SudokuProfile
+        profiler = SudokuProfile.as_profiler(profile)
+        phases = [(SudokuArray, 'propagate_boards'), (sys.modules[__name__], 'split_boards'),
+                  (SudokuArray, 'to_sudoku_board')]
+        with profiler.profiling('solve_batch', [SudokuStarter.SudokuBoard], phases):
+            results = solve_batch(grids, forward_checking, MRV, MCV, LCV, splitRounds, maxFrontier)
+        if profile is True:
+            profiler.report()
+        return results
+    grids = np.array(grids, dtype=np.int32)
+    candidates = np.ones(grids.shape + (grids.shape[1],), dtype=bool)
+    ok = SudokuArray.propagate_boards(grids, candidates)
+    solved = ok & (grids != 0).all(axis=(1, 2))
+    solutions = dict((b, grids[b]) for b in np.flatnonzero(solved))
+
+    # lockstep branching: children that propagate to a full board solve their puzzle, failed ones are dropped
+    open_ = ok & ~solved
+    frontier = (grids[open_], candidates[open_], np.flatnonzero(open_))
+    for r in range(splitRounds):
+        if len(frontier[0]) == 0 or len(frontier[0]) > maxFrontier:
+            break
+        childGrids, childCandidates, owners = split_boards(*frontier)
+        childOk = SudokuArray.propagate_boards(childGrids, childCandidates)
+        childSolved = childOk & (childGrids != 0).all(axis=(1, 2))
+        for k in np.flatnonzero(childSolved):
+            if owners[k] not in solutions:
+                solutions[owners[k]] = childGrids[k]
+        keep = childOk & ~childSolved & ~np.in1d(owners, solutions.keys())
+        frontier = (childGrids[keep], childCandidates[keep], owners[keep])
+
+    # whatever is left is searched per puzzle, starting from its surviving branches in order
+    branches = {}
+    for k in range(len(frontier[0])):
+        branches.setdefault(frontier[2][k], []).append(k)
+    results = []
+    for b in range(len(grids)):
+        if b in solutions:
+            results.append(SudokuArray.to_sudoku_board(solutions[b]))
+            continue
+        result = False
+        for k in branches.get(b, []):
+            board = SudokuArray.to_sudoku_board(frontier[0][k], frontier[1][k])
+            result = SudokuStarter.backTrack(board, forward_checking, MRV, MCV, LCV)
+            if result != False:
+                break
+        results.append(result)
+    return results
+
+
+def solve_one_at_a_time(fileNames, forward_checking=True, MRV=True, MCV=False, LCV=True):
+    """The reference path: init_board and backTrack for every file in turn (without solve()'s printing)."""
+    return [SudokuStarter.backTrack(SudokuStarter.init_board(fileName), forward_checking, MRV, MCV, LCV)
+            for fileName in fileNames]
+
+
+def compare_throughput(fileNames):
+    """Solves fileNames with solve_batch and one at a time and returns (batch, single) throughput in puzzles per
+    second. Both must return complete boards that keep the clues; some of the bundled puzzles have more than one
+    solution, and the two paths don't always find the same one of those."""
+    start = time.time()
+    puzzles = load_boards(fileNames)
+    batchResults = solve_batch(puzzles)
+    batchTime = time.time()-start
+    start = time.time()
+    singleResults = solve_one_at_a_time(fileNames)
+    singleTime = time.time()-start
+    for results in (batchResults, singleResults):
+        if False in results:
+            raise ValueError("a puzzle was not solved")
+        boards = SudokuArray.boards_to_array(results)
+        if not SudokuArray.validate_boards(boards)[0].all() or ((puzzles != 0) & (puzzles != boards)).any():
+            raise ValueError("a returned board is not a solution of its puzzle")
+    return len(fileNames)/batchTime, len(fileNames)/singleTime
+
+
+if __name__ == '__main__':
+    # usage: SudokuBatch.py [--profile] [puzzle directory] [number of copies of every puzzle]
+    arguments = [argument for argument in sys.argv[1:] if argument != "--profile"]
+    directory = arguments[0] if len(arguments) > 0 else "input_puzzles/more/9x9"
+    copies = int(arguments[1]) if len(arguments) > 1 else 100
+    fileNames = sorted(glob.glob(os.path.join(directory, "*.sudoku"))) * copies
+    if "--profile" in sys.argv:
+        solve_batch(load_boards(fileNames), profile=True)
+        sys.exit()
+    batch, single = compare_throughput(fileNames)
+    print "%d puzzles: batch %.1f puzzles/s, one at a time %.1f puzzles/s (%.1fx)" % (len(fileNames), batch, single, batch/single)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Micro-benchmarks of the hot functions on their own, with warm-up, repeated samples and median/IQR statistics.
+
+import copy, gc, json, os, sys
+from timeit import default_timer
+import SudokuStarter
+
+# the boards the benchmarks run on: size -> a puzzle that propagation leaves with many empty tiles
+PUZZLES = {9: "input_puzzles/more/9x9/9x9.12.sudoku", 16: "input_puzzles/more/16x16/16x16.2.sudoku",
+           25: "input_puzzles/more/25x25/25x25.10.sudoku"}
+FIELDS = ["function", "size", "calls", "median_us", "q1_us", "q3_us", "iqr_us", "min_us"]
+
+
+class State(object):
+    """The representative state of one puzzle: its file, its parsed (propagated) board, the tile MRV branches on
+    first with that tile's first possible value, and its solution."""
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.board = SudokuStarter.init_board(fileName)
+        self.row, self.col = SudokuStarter.selectUnassignedVariable(self.board, True, False) or (0, 0)
+        possible = self.board.PossibleNum[self.row][self.col]
+        self.value = possible[0] if possible else 1
+        self.solution = next(SudokuStarter.iter_solutions(copy.deepcopy(self.board)), self.board)
+
+
+def _copies(state, number):
+    return [copy.deepcopy(state.board) for i in range(number)]
+
+
+_devnull = open(os.devnull, 'w')
+
+
+def _print_board(board):
+    stdout = sys.stdout
+    sys.stdout = _devnull
+    try:
+        board.print_board()
+    finally:
+        sys.stdout = stdout
+
+# name -> (setup(state, number) giving the argument of every call, call(state, argument)); setup runs untimed,
+# so the functions that change a board get a fresh copy for every call
+BENCHMARKS = [
+    ("set_value", (_copies, lambda state, board: board.set_value(state.row, state.col, state.value))),
+    ("set_value_no_forward_checking",
+     (_copies, lambda state, board: board.set_value_no_forward_checking(state.row, state.col, state.value))),
+    ("orderDomainValues", (None, lambda state, arg: SudokuStarter.orderDomainValues(state.board,
+                                                                                    [state.row, state.col]))),
+    ("is_complete", (None, lambda state, arg: SudokuStarter.is_complete(state.solution))),
+    ("parse_file", (None, lambda state, arg: SudokuStarter.parse_file(state.fileName))),
+    ("print_board", (None, lambda state, arg: _print_board(state.solution))),
+    ("deepcopy", (None, lambda state, arg: copy.deepcopy(state.board))),
+]
+
+
+def _run(state, setup, call, number):
+    # seconds for number calls, not counting the setup; the garbage collector is off like in timeit
+    arguments = setup(state, number) if setup is not None else [None]*number
+    gcEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = default_timer()
+        for argument in arguments:
+            call(state, argument)
+        return default_timer()-start
+    finally:
+        if gcEnabled:
+            gc.enable()
+
+
+def _quantile(samples, q):
+    # linear interpolation between the closest ranks of the sorted samples
+    position = (len(samples)-1)*q
+    lower = int(position)
+    upper = min(lower+1, len(samples)-1)
+    return samples[lower]+(samples[upper]-samples[lower])*(position-lower)
+
+
+def measure(state, setup, call, repeat=11, warmup=2, minSample=0.01):
+    """Times call on state: finds how many calls take at least minSample seconds, runs warmup samples of that
+    many calls untimed and then repeat timed ones. Returns (calls per sample, sorted seconds per call)."""
+    number = 1
+    while True:
+        if _run(state, setup, call, number) >= minSample or number >= 1 << 20:
+            break
+        number *= 2
+    for i in range(warmup):
+        _run(state, setup, call, number)
+    return number, sorted(_run(state, setup, call, number)/number for i in range(repeat))
+
+
+def run_benchmarks(names=None, sizes=None, repeat=11, warmup=2):
+    """Runs the BENCHMARKS called names (all by default) on the puzzles of sizes (all of PUZZLES by default).
+    Returns a list of dicts with the FIELDS keys, times in microseconds per call."""
+    rows = []
+    for size in sorted(sizes or PUZZLES):
+        state = State(PUZZLES[size])
+        for name, (setup, call) in BENCHMARKS:
+            if names and name not in names:
+                continue
+            number, samples = measure(state, setup, call, repeat, warmup)
+            q1, median, q3 = [_quantile(samples, q)*1e6 for q in (0.25, 0.5, 0.75)]
+            rows.append(dict(function=name, size=size, calls=number, median_us=median, q1_us=q1, q3_us=q3,
+                             iqr_us=q3-q1, min_us=samples[0]*1e6))
+    return rows
+
+
+def write_csv(rows, filename):
+    f = open(filename, 'w')
+    f.write(",".join(FIELDS)+"\n")
+    for row in rows:
+        f.write(",".join(str(row[field]) for field in FIELDS)+"\n")
+    f.close()
+
+
+def write_json(rows, filename):
+    f = open(filename, 'w')
+    json.dump(dict(python=sys.version.split()[0], results=rows), f, indent=1, sort_keys=True)
+    f.close()
+
+
+if __name__ == '__main__':
+    # usage: SudokuBench.py [--json output file] [--csv output file] [function name...]
+    arguments = sys.argv[1:]
+    outputs = {}
+    for option in ["--json", "--csv"]:
+        if option in arguments:
+            index = arguments.index(option)
+            outputs[option] = arguments[index+1]
+            del arguments[index:index+2]
+    rows = run_benchmarks(arguments or None)
+    for row in rows:
+        print "%(function)-30s %(size)3d: median %(median_us)10.2f us, IQR %(iqr_us)8.2f us (%(calls)d calls/sample)" % row
+    if "--json" in outputs:
+        write_json(rows, outputs["--json"])
+    if "--csv" in outputs:
+        write_csv(rows, outputs["--csv"])
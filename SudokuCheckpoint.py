@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# backTrack with an explicit stack of choice points that can be saved to disk and resumed later.
+
+import copy, os, signal, sys, time
+import cPickle as pickle
+import SudokuStarter
+
+VERSION = 1
+# saves a checkpoint and carries on (there is no SIGUSR1 on Windows)
+SAVE_SIGNAL = getattr(signal, 'SIGUSR1', None)
+# save a checkpoint and stop the search
+STOP_SIGNALS = [getattr(signal, name) for name in ('SIGTERM', 'SIGINT') if hasattr(signal, name)]
+
+
+class Frame(object):
+    """A choice point: the board of a node, the tile it branches on, the values in the order they are tried
+    and how many of them have been tried."""
+    __slots__ = ('board', 'row', 'col', 'values', 'index')
+
+    def __init__(self, board, row, col, values, index=0):
+        self.board = board
+        self.row = row
+        self.col = col
+        self.values = values
+        self.index = index
+
+
+def _branch(board, forward_checking, MRV, MCV, LCV):
+    """Returns (row, col, values) of the tile backTrack would branch on next, or None if it would return False."""
+    if forward_checking:
+        nextTile = SudokuStarter.selectUnassignedVariable(board, MRV, MCV)
+        if nextTile == False:
+            return None
+        nextRow, nextCol = nextTile
+        if LCV:
+            return nextRow, nextCol, SudokuStarter.orderDomainValues(board, [nextRow, nextCol])
+        return nextRow, nextCol, list(board.PossibleNum[nextRow][nextCol])
+    size = board.BoardSize
+    for row in range(size):
+        for col in range(size):
+            if board.CurrentGameBoard[row][col] == 0:
+                return row, col, list(board.PossibleNum[row][col])
+    return -1, -1, list(board.PossibleNum[-1][-1])
+
+
+def _consistent(board, row, col, val):
+    # the consistency check of backTrack without forward checking
+    SudokuStarter.consistencyChecks += 1
+    for i in range(0, board.BoardSize):
+        if val == board.CurrentGameBoard[i][col] or val == board.CurrentGameBoard[row][i]:
+            return False
+    topRow = (row/board.squareSize)*board.squareSize
+    topCol = (col/board.squareSize)*board.squareSize
+    for i in range(topRow, topRow+board.squareSize):
+        for j in range(topCol, topCol+board.squareSize):
+            if i != row and j != col and board.CurrentGameBoard[i][j] == val:
+                return False
+    return True
+
+
+def _child(board, row, col, val, forward_checking):
+    boardCopy = copy.deepcopy(board)
+    if forward_checking:
+        boardCopy.set_value(row, col, val)
+    else:
+        boardCopy.set_value_no_forward_checking(row, col, val)
+    return boardCopy
+
+
+def save_checkpoint(filename, initial_board, options, stack, elapsed):
+    """Writes the search state to filename: the starting board, the solve() options, for every choice point
+    its tile, its values and how many were tried, and the stats so far. Boards below the starting one are not
+    saved; load_checkpoint rebuilds them by replaying the choices. The file is replaced atomically, so an
+    interruption while writing keeps the previous checkpoint (on Windows, in the .tmp file at worst)."""
+    state = dict(version=VERSION, board=initial_board, options=options, elapsed=elapsed,
+                 consistencyChecks=SudokuStarter.consistencyChecks,
+                 frames=[(frame.row, frame.col, frame.values, frame.index) for frame in stack])
+    f = open(filename+'.tmp', 'wb')
+    pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+    f.close()
+    try:
+        os.rename(filename+'.tmp', filename)
+    except OSError:
+        # Windows doesn't rename onto an existing file: the old checkpoint has to go first (so there, a crash
+        # right in between leaves only the .tmp file)
+        os.remove(filename)
+        os.rename(filename+'.tmp', filename)
+
+
+def load_checkpoint(filename):
+    """Reads a checkpoint back. Returns (starting board, options, stack of Frames, the board of the node the
+    search was about to visit, elapsed seconds, consistency checks)."""
+    f = open(filename, 'rb')
+    state = pickle.load(f)
+    f.close()
+    if state.get('version') != VERSION:
+        raise ValueError("%s is not a version %d checkpoint" % (filename, VERSION))
+    forward_checking = state['options'][0]
+    stack = []
+    node = copy.deepcopy(state['board'])
+    for row, col, values, index in state['frames']:
+        stack.append(Frame(node, row, col, values, index))
+        node = _child(node, row, col, values[index-1], forward_checking)
+    return state['board'], state['options'], stack, node, state['elapsed'], state['consistencyChecks']
+
+
+def _same_puzzle(board, other):
+    return [list(row) for row in board.CurrentGameBoard] == [list(row) for row in other.CurrentGameBoard]
+
+
+def resumable_backtrack(initial_board, forward_checking, MRV, MCV, LCV, checkpoint, interval=60):
+    """Searches like backTrack (same order, same consistency checks, same result) but keeps its choice points
+    on an explicit stack, saved to the file checkpoint every interval seconds, on SIGUSR1 (where there is one),
+    and on SIGTERM or SIGINT (after which it exits). If checkpoint exists the search resumes from it instead of starting over;
+    it must have been made for the same puzzle and options. The file is removed once the search finishes."""
+    options = (forward_checking, MRV, MCV, LCV)
+    start = time.time()
+    if os.path.exists(checkpoint):
+        savedBoard, savedOptions, stack, node, elapsed, checks = load_checkpoint(checkpoint)
+        if tuple(savedOptions) != options or not _same_puzzle(savedBoard, initial_board):
+            raise ValueError(checkpoint+" was saved for a different puzzle or different solve() options")
+        initial_board = savedBoard
+        SudokuStarter.consistencyChecks = checks
+        start -= elapsed
+    else:
+        stack = []
+        node = initial_board
+
+    requested = []
+
+    def on_signal(signum, frame):
+        requested.append(signum)
+    handlers = {}
+    try:
+        for signum in [SAVE_SIGNAL]+STOP_SIGNALS:
+            if signum is not None:
+                handlers[signum] = signal.signal(signum, on_signal)
+    except ValueError:
+        pass    # signals can only be caught in the main thread; the periodic checkpoints still happen
+
+    try:
+        lastSaved = time.time()
+        while True:
+            if requested or time.time()-lastSaved >= interval:
+                # the node is not expanded yet, so the stack alone says where to continue
+                save_checkpoint(checkpoint, initial_board, options, stack, time.time()-start)
+                lastSaved = time.time()
+                if [signum for signum in requested if signum != SAVE_SIGNAL]:
+                    sys.exit("search interrupted, resume it from "+checkpoint)
+                del requested[:]
+
+            if SudokuStarter.is_complete(node):
+                result = node
+                break
+            nextBranch = _branch(node, forward_checking, MRV, MCV, LCV)
+            if nextBranch is not None:
+                stack.append(Frame(node, *nextBranch))
+            # move on to the next value of the deepest choice point that has one left
+            node = None
+            while stack and node is None:
+                frame = stack[-1]
+                if frame.index == len(frame.values):
+                    stack.pop()
+                    continue
+                val = frame.values[frame.index]
+                frame.index += 1
+                if forward_checking or _consistent(frame.board, frame.row, frame.col, val):
+                    node = _child(frame.board, frame.row, frame.col, val, forward_checking)
+            if node is None:
+                result = False
+                break
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return result
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# A compact SudokuBoard: the whole state is one flat bytearray, so a snapshot for branching is one buffer copy.
+
+import math, copy, sys, time
+import SudokuStarter
+
+
+class CompactSudokuBoard(object):
+    """A SudokuBoard that keeps its state in a single bytearray laid out as
+    [N*N tile values][N*N constraint counts + 1][N*N*N possible number flags].
+    set_value does exactly what SudokuBoard.set_value does, so searches take the same path. CurrentGameBoard,
+    PossibleNum and BoardConstraintsNum are built from the buffer when they are read and cached until the next
+    change, so backTrack and its heuristics can use the board unchanged."""
+    __slots__ = ('BoardSize', 'squareSize', 'buf', '_rows', '_possible', '_constraints')
+
+    def __init__(self, size, board):
+        """the constructor for the CompactSudokuBoard"""
+        self.BoardSize = size
+        self.squareSize = int(math.sqrt(self.BoardSize))
+        constraints = (self.BoardSize-1)*2+(self.squareSize-1)**2
+        if constraints+1 > 255:
+            raise ValueError("CompactSudokuBoard only supports boards with fewer than 100 rows")
+        self.buf = bytearray(size*size) + bytearray([constraints+1]) * (size*size) + bytearray([1]) * size**3
+        for row in range(size):
+            self.buf[row*size:(row+1)*size] = bytearray(board[row])
+        self._clear_cache()
+
+    @classmethod
+    def from_board(cls, sudoku):
+        """Copies the state of a regular SudokuBoard into a CompactSudokuBoard."""
+        size = sudoku.BoardSize
+        compact = cls(size, sudoku.CurrentGameBoard)
+        for row in range(size):
+            for col in range(size):
+                tile = row*size+col
+                compact.buf[size*size+tile] = max(sudoku.BoardConstraintsNum[row][col]+1, 0)
+                flags = bytearray(size)
+                for value in sudoku.PossibleNum[row][col]:
+                    flags[value-1] = 1
+                compact.buf[2*size*size+tile*size:2*size*size+(tile+1)*size] = flags
+        return compact
+
+    def _clear_cache(self):
+        self._rows = None
+        self._possible = None
+        self._constraints = None
+
+    def clone(self):
+        """Returns a copy of this board. The copy is one bytearray copy; nothing else is shared or copied."""
+        boardCopy = CompactSudokuBoard.__new__(CompactSudokuBoard)
+        boardCopy.BoardSize = self.BoardSize
+        boardCopy.squareSize = self.squareSize
+        boardCopy.buf = bytearray(self.buf)
+        boardCopy._clear_cache()
+        return boardCopy
+
+    def __deepcopy__(self, memo):
+        # backTrack deep copies a board right before it branches on it; after that the parent only needs its
+        # tile values again, so its cached lists are dropped to keep every board waiting on the stack compact
+        self._clear_cache()
+        return self.clone()
+
+    @property
+    def CurrentGameBoard(self):
+        if self._rows is None:
+            N = self.BoardSize
+            self._rows = [self.buf[row*N:(row+1)*N] for row in range(N)]
+        return self._rows
+
+    @property
+    def PossibleNum(self):
+        if self._possible is None:
+            N = self.BoardSize
+            base = 2*N*N
+            values = range(1, N+1)
+            buf = self.buf
+            self._possible = [[[value for value, possible in zip(values, buf[base+(row*N+col)*N:base+(row*N+col+1)*N])
+                                if possible] for col in range(N)] for row in range(N)]
+        return self._possible
+
+    @property
+    def BoardConstraintsNum(self):
+        if self._constraints is None:
+            N = self.BoardSize
+            counts = self.buf[N*N:2*N*N]
+            self._constraints = [[counts[row*N+col]-1 for col in range(N)] for row in range(N)]
+        return self._constraints
+
+    def _remove_possible(self, tile, value):
+        """Removes value from the possible numbers of tile. Returns false if tile is empty and has none left."""
+        N = self.BoardSize
+        base = 2*N*N+tile*N
+        self.buf[base+value-1] = 0
+        return self.buf[tile] != 0 or self.buf.find('\x01', base, base+N) != -1
+
+    def removePossibleNum(self, row, col, value):
+        """Removes value from the PossibleNum of a tile (if it's there), like SudokuBoard.removePossibleNum."""
+        N = self.BoardSize
+        self.buf[2*N*N+(row*N+col)*N+value-1] = 0
+        if self._possible is not None and value in self._possible[row][col]:
+            self._possible[row][col].remove(value)
+
+    def _only_possible(self, tile):
+        """Returns the only possible number of tile, or 0 if it has none or more than one."""
+        N = self.BoardSize
+        base = 2*N*N+tile*N
+        if self.buf.count('\x01', base, base+N) != 1:
+            return 0
+        return self.buf.find('\x01', base, base+N)-base+1
+
+    def _decrement_constraints(self, tile):
+        # filled tiles keep 0 (BoardConstraintsNum -1); SudokuBoard lets those go further negative, but no
+        # heuristic ever reads the count of a filled tile
+        N = self.BoardSize
+        if self.buf[N*N+tile] > 0 and self.buf[tile] == 0:
+            self.buf[N*N+tile] -= 1
+
+    def set_value(self, row, col, value):
+        """This function will CHANGE the sudoku board object with the input
+        value placed on the GameBoard row and col are both zero-indexed"""
+        # Same steps and same early returns as SudokuBoard.set_value, on the flat buffer.
+        SudokuStarter.consistencyChecks += 1
+        N = self.BoardSize
+        buf = self.buf
+        if buf[row*N+col] != 0:
+            return False
+        self._clear_cache()
+        buf[row*N+col] = value
+        buf[N*N+row*N+col] = 0
+        for i in range(0, N):
+            if not self._remove_possible(i*N+col, value):
+                return False
+            self._decrement_constraints(i*N+col)
+            if not self._remove_possible(row*N+i, value):
+                return False
+            self._decrement_constraints(row*N+i)
+        topRow = (row/self.squareSize)*self.squareSize
+        topCol = (col/self.squareSize)*self.squareSize
+        for i in range(topRow, topRow+self.squareSize):
+            for j in range(topCol, topCol+self.squareSize):
+                if not self._remove_possible(i*N+j, value):
+                    return False
+                if i != row and j != col:
+                    self._decrement_constraints(i*N+j)
+        base = 2*N*N+(row*N+col)*N
+        buf[base:base+N] = bytearray(N)
+
+        # set the tiles that have only one possible value left, like SudokuBoard.set_value
+        for i in range(0, N):
+            value = self._only_possible(i*N+col)
+            if value and not self.set_value(i, col, value):
+                return False
+            value = self._only_possible(row*N+i)
+            if value and not self.set_value(row, i, value):
+                return False
+        for i in range(topRow, topRow+self.squareSize):
+            for j in range(topCol, topCol+self.squareSize):
+                value = self._only_possible(i*N+j)
+                if value and not self.set_value(i, j, value):
+                    return False
+        return True
+
+    def set_value_no_forward_checking(self, row, col, value):
+        """This function will CHANGE the sudoku board object with the input
+        value placed on the GameBoard row and col are both zero-indexed"""
+        N = self.BoardSize
+        if self.buf[row*N+col] != 0:
+            return False
+        self._clear_cache()
+        self.buf[row*N+col] = value
+        self.buf[N*N+row*N+col] = 0
+        base = 2*N*N+(row*N+col)*N
+        self.buf[base:base+N] = bytearray(N)
+        return True
+
+    def print_board(self):
+        """Prints the current game board. Leaves unassigned spots blank."""
+        SudokuStarter.SudokuBoard(self.BoardSize, [list(row) for row in self.CurrentGameBoard]).print_board()
+
+
+def parse_file_compact(filename):
+    """Parses a sudoku text file into a CompactSudokuBoard, placing the clues with set_value like parse_file."""
+    f = open(filename, 'r')
+    BoardSize = int(f.readline())
+    NumVals = int(f.readline())
+    sudoku = CompactSudokuBoard(BoardSize, [[0]*BoardSize for i in range(BoardSize)])
+    for i in range(NumVals):
+        chars = f.readline().split()
+        if not int(chars[2]) == 0:
+            sudoku.set_value(int(chars[0])-1, int(chars[1])-1, int(chars[2]))
+    f.close()
+    return sudoku
+
+
+def init_compact_board(file_name):
+    """Creates a CompactSudokuBoard object initialized with values from a text file"""
+    return parse_file_compact(file_name)
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate number of bytes held by obj and everything it references (ints and strings included)."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(obj.__dict__, seen)
+    elif isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen)+deep_sizeof(item, seen) for key, item in obj.items())
+    if hasattr(type(obj), '__slots__'):
+        size += sum(deep_sizeof(getattr(obj, name), seen) for name in type(obj).__slots__ if hasattr(obj, name))
+    return size
+
+
+def compare_boards(file_name, repeat=20):
+    """Returns ((SudokuBoard bytes, CompactSudokuBoard bytes), (deepcopy seconds, clone seconds)) for a puzzle."""
+    board = SudokuStarter.init_board(file_name)
+    compact = init_compact_board(file_name)
+    compact._clear_cache()
+    start = time.time()
+    for i in range(repeat):
+        copy.deepcopy(board)
+    deepcopyTime = (time.time()-start)/repeat
+    start = time.time()
+    for i in range(repeat):
+        copy.deepcopy(compact)
+    cloneTime = (time.time()-start)/repeat
+    return (deep_sizeof(board), deep_sizeof(compact)), (deepcopyTime, cloneTime)
+
+
+if __name__ == '__main__':
+    for fileName in sys.argv[1:] or ["input_puzzles/easy/9_9.sudoku", "input_puzzles/easy/16_16.sudoku",
+                                     "input_puzzles/easy/25_25.sudoku"]:
+        (boardBytes, compactBytes), (deepcopyTime, cloneTime) = compare_boards(fileName)
+        print "%s: %d -> %d bytes per board (%.0fx), copy %.3g -> %.3g s (%.0fx)" % (
+            fileName, boardBytes, compactBytes, float(boardBytes)/compactBytes, deepcopyTime, cloneTime,
+            deepcopyTime/cloneTime)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# A copy-on-write SudokuBoard: a deep copy shares every row with its parent until set_value first changes it.
+
+import copy, sys, time
+import SudokuStarter
+from SudokuCompact import deep_sizeof
+
+# the lists of rows (or units) a board shares with its copies
+SHARED = ['CurrentGameBoard', 'BoardConstraintsNum', 'PossibleNum', 'RowValueCount', 'ColValueCount', 'BoxValueCount']
+
+
+class CowSudokuBoard(SudokuStarter.SudokuBoard):
+    """A SudokuBoard whose deep copies share their rows of CurrentGameBoard and BoardConstraintsNum, their
+    PossibleNum lists (per tile) and their value count rows with the board they were copied from. A row is
+    copied the first time the board changes it, so sibling branches of backTrack only own what their own
+    set_value touched. set_value itself is SudokuBoard.set_value, so searches take the same path."""
+
+    def __init__(self, size, board):
+        """the constructor for the CowSudokuBoard"""
+        SudokuStarter.SudokuBoard.__init__(self, size, board)
+        self._own_all()
+
+    @classmethod
+    def from_board(cls, sudoku):
+        """Copies the state of a regular SudokuBoard into a CowSudokuBoard."""
+        cow = cls(sudoku.BoardSize, [row[:] for row in sudoku.CurrentGameBoard])
+        cow.BoardConstraintsNum = [row[:] for row in sudoku.BoardConstraintsNum]
+        cow.PossibleNum = [[tile[:] for tile in row] for row in sudoku.PossibleNum]
+        cow.countPossibleNum()
+        return cow
+
+    def _own_all(self):
+        # a board that made all its lists itself owns all of them
+        self._owned = dict((name, set(range(self.BoardSize))) for name in SHARED)
+        self._owned['tile'] = set(range(self.BoardSize*self.BoardSize))
+
+    def _share_all(self):
+        self._owned = dict((name, set()) for name in SHARED+['tile'])
+
+    def __deepcopy__(self, memo):
+        """Copies only the outer lists. From now on this board and the copy share every row, so neither owns them."""
+        boardCopy = copy.copy(self)
+        for name in SHARED:
+            setattr(boardCopy, name, list(getattr(self, name)))
+        self._share_all()
+        boardCopy._share_all()
+        return boardCopy
+
+    def _writable(self, name, index):
+        """Returns row index of the list called name, copying it first if it is still shared."""
+        table = getattr(self, name)
+        owned = self._owned[name]
+        if index not in owned:
+            table[index] = table[index][:]
+            owned.add(index)
+        return table[index]
+
+    def _writable_tile(self, row, col):
+        possibleRow = self._writable('PossibleNum', row)
+        tile = row*self.BoardSize+col
+        if tile not in self._owned['tile']:
+            possibleRow[col] = possibleRow[col][:]
+            self._owned['tile'].add(tile)
+        return possibleRow[col]
+
+    def countPossibleNum(self):
+        SudokuStarter.SudokuBoard.countPossibleNum(self)
+        if hasattr(self, '_owned'):
+            for name in ['RowValueCount', 'ColValueCount', 'BoxValueCount']:
+                self._owned[name] = set(range(self.BoardSize))
+
+    def removePossibleNum(self, row, col, value):
+        """Removes value from the PossibleNum of a tile (if it's there) and updates the value counts."""
+        if value in self.PossibleNum[row][col]:
+            self._writable_tile(row, col).remove(value)
+            self.PossibleCount -= 1
+            self._writable('RowValueCount', row)[value] -= 1
+            self._writable('ColValueCount', col)[value] -= 1
+            self._writable('BoxValueCount', (row/self.squareSize)*self.squareSize+col/self.squareSize)[value] -= 1
+
+    def clearPossibleNum(self, row, col):
+        """Empties the PossibleNum of a tile and updates the value counts."""
+        box = (row/self.squareSize)*self.squareSize+col/self.squareSize
+        for value in self.PossibleNum[row][col]:
+            self._writable('RowValueCount', row)[value] -= 1
+            self._writable('ColValueCount', col)[value] -= 1
+            self._writable('BoxValueCount', box)[value] -= 1
+        self.PossibleCount -= len(self.PossibleNum[row][col])
+        self._writable('PossibleNum', row)[col] = []
+        self._owned['tile'].add(row*self.BoardSize+col)
+
+    def set_value(self, row, col, value):
+        """This function will CHANGE the sudoku board object with the input
+        value placed on the GameBoard row and col are both zero-indexed"""
+        if self.CurrentGameBoard[row][col] == 0:
+            # SudokuBoard.set_value writes the tile's row and decrements a constraint count in every row
+            # (the tile's column); PossibleNum and the value counts are only changed through the methods above
+            self._writable('CurrentGameBoard', row)
+            if len(self._owned['BoardConstraintsNum']) < self.BoardSize:
+                for i in range(self.BoardSize):
+                    self._writable('BoardConstraintsNum', i)
+        return SudokuStarter.SudokuBoard.set_value(self, row, col, value)
+
+    def set_value_no_forward_checking(self, row, col, value):
+        """This function will CHANGE the sudoku board object with the input
+        value placed on the GameBoard row and col are both zero-indexed"""
+        if self.CurrentGameBoard[row][col] == 0:
+            self._writable('CurrentGameBoard', row)
+            self._writable('BoardConstraintsNum', row)
+        return SudokuStarter.SudokuBoard.set_value_no_forward_checking(self, row, col, value)
+
+
+def parse_file_cow(filename):
+    """Parses a sudoku text file into a CowSudokuBoard, placing the clues with set_value like parse_file."""
+    return CowSudokuBoard.from_board(SudokuStarter.parse_file(filename))
+
+
+def init_cow_board(file_name):
+    """Creates a CowSudokuBoard object initialized with values from a text file"""
+    return parse_file_cow(file_name)
+
+
+def compare_boards(file_name, depth=8):
+    """Follows the first branch of backTrack for depth levels with both board types and returns
+    ((SudokuBoard bytes, CowSudokuBoard bytes), (SudokuBoard seconds, CowSudokuBoard seconds)): the memory held
+    by all the boards on the path (counting what they share once) and the time to copy and branch on them."""
+    results = []
+    for board in [SudokuStarter.init_board(file_name), init_cow_board(file_name)]:
+        path = [board]
+        start = time.time()
+        for i in range(depth):
+            nextTile = SudokuStarter.selectUnassignedVariable(path[-1], True, False)
+            if nextTile == False:
+                break
+            child = copy.deepcopy(path[-1])
+            if not child.set_value(nextTile[0], nextTile[1], path[-1].PossibleNum[nextTile[0]][nextTile[1]][0]):
+                break
+            path.append(child)
+        results.append((deep_sizeof(path), time.time()-start))
+    return (results[0][0], results[1][0]), (results[0][1], results[1][1])
+
+
+if __name__ == '__main__':
+    for fileName in sys.argv[1:] or ["input_puzzles/easy/16_16.sudoku", "input_puzzles/easy/25_25.sudoku"]:
+        (boardBytes, cowBytes), (boardTime, cowTime) = compare_boards(fileName)
+        print "%s: %d -> %d bytes along the search path (%.1fx), branching %.3g -> %.3g s" % (
+            fileName, boardBytes, cowBytes, float(boardBytes)/cowBytes, boardTime, cowTime)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Generates sudoku puzzles of any perfect-square size: a random filled grid with clues removed down to a target density.
+
+import copy, math, random, sys
+import SudokuStarter
+
+
+def filled_grid(size, rng=random):
+    """Returns a random valid filled size x size grid (size must be a perfect square). It starts from the
+    pattern grid and shuffles rows inside bands, bands, columns inside stacks, stacks and the values, which
+    all keep a grid valid."""
+    s = int(math.sqrt(size))
+    if s*s != size:
+        raise ValueError("board size must be a perfect square, got "+str(size))
+
+    def shuffled_lines():
+        bands = range(s)
+        rng.shuffle(bands)
+        lines = []
+        for band in bands:
+            inner = range(s)
+            rng.shuffle(inner)
+            lines += [band*s+i for i in inner]
+        return lines
+    rows = shuffled_lines()
+    cols = shuffled_lines()
+    values = range(1, size+1)
+    rng.shuffle(values)
+    # the pattern grid: row r is the values shifted by s*(r%s)+r/s
+    return [[values[(s*(r % s)+r/s+c) % size] for c in cols] for r in rows]
+
+
+def count_solutions(board, limit=2):
+    """Counts the solutions of a SudokuBoard (after propagation), stopping once limit of them are found."""
+    size = board.BoardSize
+    nextRow, nextCol, fewest = -1, -1, size+1
+    for row in range(size):
+        for col in range(size):
+            if board.CurrentGameBoard[row][col] == 0 and len(board.PossibleNum[row][col]) < fewest:
+                nextRow, nextCol, fewest = row, col, len(board.PossibleNum[row][col])
+    if nextRow == -1:
+        return 1 if SudokuStarter.is_complete(board) else 0
+    found = 0
+    for value in list(board.PossibleNum[nextRow][nextCol]):
+        boardCopy = copy.deepcopy(board)
+        if boardCopy.set_value(nextRow, nextCol, value):
+            found += count_solutions(boardCopy, limit-found)
+            if found >= limit:
+                break
+    return found
+
+
+def board_from_clues(size, clues):
+    """Returns a SudokuBoard with the {(row, col): value} clues placed with set_value, or None if they conflict."""
+    board = SudokuStarter.SudokuBoard(size, [[0]*size for i in range(size)])
+    for (row, col), value in clues.items():
+        # propagation may already have filled the tile in
+        if board.CurrentGameBoard[row][col] == 0:
+            if not board.set_value(row, col, value):
+                return None
+        elif board.CurrentGameBoard[row][col] != value:
+            return None
+    return board
+
+
+def generate_puzzle(size, density, unique=False, rng=random):
+    """Returns a size x size puzzle grid (0 for empty tiles) with about density*size*size clues, made by
+    removing clues from a random filled grid in random order. With unique=True a clue is only removed if the
+    puzzle keeps exactly one solution, so the result may have more clues than asked for."""
+    grid = filled_grid(size, rng)
+    clues = dict(((row, col), grid[row][col]) for row in range(size) for col in range(size))
+    target = int(round(density*size*size))
+    tiles = clues.keys()
+    rng.shuffle(tiles)
+    for tile in tiles:
+        if len(clues) <= target:
+            break
+        value = clues.pop(tile)
+        if unique:
+            board = board_from_clues(size, clues)
+            if board is None or count_solutions(board) != 1:
+                clues[tile] = value
+    puzzle = [[0]*size for i in range(size)]
+    for (row, col), value in clues.items():
+        puzzle[row][col] = value
+    return puzzle
+
+
+def write_puzzle(puzzle, filename):
+    """Writes a puzzle grid in the input_puzzles format: the size, the number of clues, then row col value
+    (one-indexed) per clue."""
+    size = len(puzzle)
+    clues = [(row+1, col+1, puzzle[row][col]) for row in range(size) for col in range(size) if puzzle[row][col]]
+    f = open(filename, 'w')
+    f.write("%d\n%d\n" % (size, len(clues)))
+    for clue in clues:
+        f.write("%d\t%d\t%d\n" % clue)
+    f.close()
+
+
+if __name__ == '__main__':
+    # usage: SudokuGenerator.py size density output_file [unique] [seed]
+    size, density, fileName = int(sys.argv[1]), float(sys.argv[2]), sys.argv[3]
+    unique = len(sys.argv) > 4 and sys.argv[4].lower() in ('1', 'true', 'unique')
+    rng = random.Random(int(sys.argv[5])) if len(sys.argv) > 5 else random
+    write_puzzle(generate_puzzle(size, density, unique, rng), fileName)
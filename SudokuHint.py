@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Next-move hints: the cheapest deduction that fills one tile, falling back to a bounded search.
+
+import copy, sys, time
+import SudokuStarter
+
+NAKED_SINGLE = 'naked single'               # the tile has one possible value left
+HIDDEN_SINGLE_ROW = 'hidden single in row'  # the value fits nowhere else in the tile's row
+HIDDEN_SINGLE_COL = 'hidden single in column'
+HIDDEN_SINGLE_BOX = 'hidden single in box'
+CONTRADICTION = 'contradiction'             # every other value of the tile wipes out a domain when propagated
+SEARCH = 'search'                           # the tile's value in the first solution the search finds
+
+
+def naked_single(board):
+    """(row, col, value) of an empty tile with exactly one value in its PossibleNum, or None."""
+    N = board.BoardSize
+    for row in range(N):
+        for col in range(N):
+            if board.CurrentGameBoard[row][col] == 0 and len(board.PossibleNum[row][col]) == 1:
+                return row, col, board.PossibleNum[row][col][0]
+    return None
+
+
+def hidden_single(board):
+    """(row, col, value, technique) of a value that only one empty tile of a row, column or sub-box still allows,
+    or None. The value counts of the board say which units have one; only those are scanned."""
+    N = board.BoardSize
+    s = board.squareSize
+    for unit in range(N):
+        for value in range(1, N+1):
+            if board.RowValueCount[unit][value] == 1:
+                for col in range(N):
+                    if value in board.PossibleNum[unit][col]:
+                        return unit, col, value, HIDDEN_SINGLE_ROW
+            if board.ColValueCount[unit][value] == 1:
+                for row in range(N):
+                    if value in board.PossibleNum[row][unit]:
+                        return row, unit, value, HIDDEN_SINGLE_COL
+            if board.BoxValueCount[unit][value] == 1:
+                topRow, topCol = (unit/s)*s, (unit % s)*s
+                for row in range(topRow, topRow+s):
+                    for col in range(topCol, topCol+s):
+                        if value in board.PossibleNum[row][col]:
+                            return row, col, value, HIDDEN_SINGLE_BOX
+    return None
+
+
+def _by_domain_size(board):
+    # the empty tiles, fewest possible values first
+    N = board.BoardSize
+    tiles = [(len(board.PossibleNum[row][col]), row, col) for row in range(N) for col in range(N)
+             if board.CurrentGameBoard[row][col] == 0]
+    return [(row, col) for count, row, col in sorted(tiles)]
+
+
+def contradiction(board, tiles=8):
+    """(row, col, value) of a tile, among the tiles with the fewest possible values, where every value but one
+    wipes out a domain when set_value propagates it, or None."""
+    for row, col in _by_domain_size(board)[:tiles]:
+        survivors = []
+        for value in board.PossibleNum[row][col]:
+            if copy.deepcopy(board).set_value(row, col, value):
+                survivors.append(value)
+                if len(survivors) > 1:
+                    break
+        if len(survivors) == 1:
+            return row, col, survivors[0]
+    return None
+
+
+def search_hint(board, seconds=1.0):
+    """(row, col, value) of the empty tile with the fewest possible values, with its value in the first
+    solution a search finds within seconds; None if the board has no solution or the time ran out."""
+    tiles = _by_domain_size(board)
+    if not tiles:
+        return None
+    for kind, payload in SudokuStarter.solve_events(copy.deepcopy(board), progressInterval=seconds/10.0):
+        if kind == 'solution':
+            row, col = tiles[0]
+            return row, col, payload.CurrentGameBoard[row][col]
+        if kind == 'progress' and payload['elapsed'] > seconds:
+            return None
+    return None
+
+
+def hint(board, searchSeconds=1.0):
+    """Returns one next move for a SudokuBoard as (row, col, value, technique), zero-indexed, using the
+    cheapest technique that finds one: naked single, hidden single, contradiction, and only then a search of
+    at most searchSeconds. Returns None if there is no empty tile, or no move was found. The board is not
+    changed and the consistency checks of the search are not counted."""
+    checks = SudokuStarter.consistencyChecks
+    try:
+        move = naked_single(board)
+        if move is not None:
+            return move+(NAKED_SINGLE,)
+        move = hidden_single(board)
+        if move is not None:
+            return move
+        move = contradiction(board)
+        if move is not None:
+            return move+(CONTRADICTION,)
+        move = search_hint(board, searchSeconds)
+        if move is not None:
+            return move+(SEARCH,)
+        return None
+    finally:
+        SudokuStarter.consistencyChecks = checks
+
+
+if __name__ == '__main__':
+    # usage: SudokuHint.py puzzle_file [hints]   asks for hints and plays them one after another
+    fileName = sys.argv[1] if len(sys.argv) > 1 else "input_puzzles/more/25x25/25x25.10.sudoku"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    board = SudokuStarter.init_board(fileName)
+    for i in range(count):
+        start = time.time()
+        move = hint(board)
+        if move is None:
+            print "no hint (the search ran out of time, or the board has no solution)"
+            break
+        row, col, value, technique = move
+        print "tile (%d, %d) = %d by %s, %.3g ms" % (row+1, col+1, value, technique, (time.time()-start)*1000)
+        board.set_value(row, col, value)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Warm-start re-solving: after a few clue edits, keep or locally repair the previous solution instead of solving again.
+
+import math, random, sys, time
+import SudokuStarter
+from SudokuGenerator import board_from_clues
+
+
+def read_clues(filename):
+    """Reads a sudoku text file into (size, {(row, col): value}) with zero-indexed rows and columns."""
+    f = open(filename, 'r')
+    size = int(f.readline())
+    count = int(f.readline())
+    clues = {}
+    for i in range(count):
+        chars = f.readline().split()
+        if int(chars[2]) != 0:
+            clues[(int(chars[0])-1, int(chars[1])-1)] = int(chars[2])
+    f.close()
+    return size, clues
+
+
+def apply_changes(clues, changes):
+    """Returns a copy of the {(row, col): value} clues with the changes made; a change to 0 removes the clue."""
+    newClues = dict(clues)
+    for tile, value in changes.items():
+        if value:
+            newClues[tile] = value
+        else:
+            newClues.pop(tile, None)
+    return newClues
+
+
+def _units(size, row, col):
+    s = int(math.sqrt(size))
+    topRow, topCol = (row/s)*s, (col/s)*s
+    tiles = set((i, col) for i in range(size)) | set((row, i) for i in range(size))
+    return tiles | set((i, j) for i in range(topRow, topRow+s) for j in range(topCol, topCol+s))
+
+
+def _first_solution(board, options):
+    return next(SudokuStarter.iter_solutions(board, *options), False)
+
+
+def resolve(solution, clues, changes, forward_checking=True, MRV=True, MCV=False, LCV=True):
+    """Re-solves a puzzle after clue edits, starting from solution, a solved SudokuBoard of the puzzle with the
+    {(row, col): value} clues. changes maps (row, col) to the new clue value, or to 0 to remove the clue.
+    Returns (new clues, new solution board or False, how it was found):
+    'kept' if the old solution still fits every clue (removing clues never breaks it),
+    'repaired' if it was enough to search again over the rows, columns and sub-boxes of the clues it breaks and
+    the tiles holding the values they swap, keeping the rest of the old solution, and
+    'full' if that had no solution either and the puzzle was solved from its clues alone, trying the old
+    solution's value of each tile first (so LCV is always used for this search)."""
+    size = solution.BoardSize
+    newClues = apply_changes(clues, changes)
+    options = (forward_checking, MRV, MCV, LCV)
+    broken = [(row, col) for (row, col), value in newClues.items() if solution.CurrentGameBoard[row][col] != value]
+    if not broken:
+        return newClues, solution, 'kept'
+
+    # a clue that breaks the solution swaps two values around: clear every tile holding either of them (so they
+    # can trade places along a chain) and the rows, columns and sub-boxes of the clue
+    cleared = set()
+    swapped = set()
+    for row, col in broken:
+        cleared |= _units(size, row, col)
+        swapped |= set([newClues[(row, col)], solution.CurrentGameBoard[row][col]])
+    cleared |= set((row, col) for row in range(size) for col in range(size)
+                   if solution.CurrentGameBoard[row][col] in swapped)
+    kept = dict(((row, col), solution.CurrentGameBoard[row][col]) for row in range(size) for col in range(size)
+                if (row, col) not in cleared)
+    kept.update(newClues)
+    if board_from_clues(size, newClues) is None:
+        return newClues, False, 'full'
+    board = board_from_clues(size, kept)
+    if board is not None:
+        result = _first_solution(board, options)
+        if result != False:
+            return newClues, result, 'repaired'
+
+    # the search from the clues alone still tries the old solution's value of every tile first
+    board = board_from_clues(size, newClues)
+    board.ValueHints = [list(row) for row in solution.CurrentGameBoard]
+    return newClues, _first_solution(board, (forward_checking, MRV, MCV, True)), 'full'
+
+
+class EditSession(object):
+    """Keeps a puzzle's clues and its latest solution so that each edit is re-solved from the previous one."""
+
+    def __init__(self, size, clues, forward_checking=True, MRV=True, MCV=False, LCV=True):
+        self.size = size
+        self.clues = dict(clues)
+        self.options = (forward_checking, MRV, MCV, LCV)
+        board = board_from_clues(size, self.clues)
+        self.solution = _first_solution(board, self.options) if board is not None else False
+
+    @classmethod
+    def from_file(cls, filename, *options):
+        size, clues = read_clues(filename)
+        return cls(size, clues, *options)
+
+    def edit(self, changes):
+        """Applies {(row, col): value} clue changes (0 removes a clue). Returns the new solution board (False if
+        the puzzle has none) and stores it, together with the new clues, for the next edit."""
+        if self.solution == False:
+            self.clues = apply_changes(self.clues, changes)
+            board = board_from_clues(self.size, self.clues)
+            self.solution = _first_solution(board, self.options) if board is not None else False
+        else:
+            self.clues, self.solution, how = resolve(self.solution, self.clues, changes, *self.options)
+        return self.solution
+
+
+def random_edit(size, clues, rng=random):
+    """Returns a random single clue edit: removing a clue, adding one or changing one, with the value picked from
+    what the other clues still allow for the tile."""
+    kind = rng.randrange(3)
+    if kind == 0 and clues:
+        return {rng.choice(clues.keys()): 0}
+    if kind == 1:
+        tiles = [(row, col) for row in range(size) for col in range(size) if (row, col) not in clues]
+    else:
+        tiles = clues.keys()
+    row, col = rng.choice(tiles)
+    others = dict(clues)
+    others.pop((row, col), None)
+    board = board_from_clues(size, others)
+    values = [value for value in range(1, size+1) if value != clues.get((row, col))]
+    if board is not None:
+        values = [value for value in board.PossibleNum[row][col] if value != clues.get((row, col))] or values
+    return {(row, col): rng.choice(values)}
+
+
+def compare_resolve(filename, edits=20, rng=random):
+    """Makes random_edits to a puzzle one after another and re-solves after each with resolve and with a full
+    solve from the clues. Returns {how: [edits, seconds of resolve, seconds of full solves]}; how is the way
+    resolve found the solution, with " (unsolvable)" added when there was none."""
+    size, clues = read_clues(filename)
+    board = board_from_clues(size, clues)
+    solution = _first_solution(board, (True, True, False, True))
+    results = {}
+    for i in range(edits):
+        change = random_edit(size, clues, rng)
+        start = time.time()
+        newClues, newSolution, how = resolve(solution, clues, change)
+        resolveTime = time.time()-start
+        start = time.time()
+        board = board_from_clues(size, newClues)
+        if board is not None:
+            _first_solution(board, (True, True, False, True))
+        fullTime = time.time()-start
+        how += "" if newSolution != False else " (unsolvable)"
+        counts = results.setdefault(how, [0, 0.0, 0.0])
+        counts[0] += 1
+        counts[1] += resolveTime
+        counts[2] += fullTime
+        if newSolution != False:
+            clues, solution = newClues, newSolution
+    return results
+
+
+if __name__ == '__main__':
+    # usage: SudokuIncremental.py [puzzle_file] [edits]
+    fileName = sys.argv[1] if len(sys.argv) > 1 else "input_puzzles/more/16x16/16x16.2.sudoku"
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    for how, (count, resolveTime, fullTime) in sorted(compare_resolve(fileName, edits, random.Random(0)).items()):
+        print "%-18s %3d edits: resolve %.3g s, full solve %.3g s per edit (%.1fx)" % (
+            how, count, resolveTime/count, fullTime/count, fullTime/max(resolveTime, 1e-9))
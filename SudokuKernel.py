@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Size-specialized search kernels: generates (once per size, cached on disk) a module with the board size, the
+# peer tables and the bit masks baked in as constants, and runs the backTrack search with it.
+
+import hashlib, imp, marshal, math, os, sys, time
+import SudokuStarter
+
+# where generated kernels are kept; SUDOKU_KERNEL_DIR overrides it
+CACHE_DIR = os.environ.get('SUDOKU_KERNEL_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'sudoku_kernels'))
+
+# The search state is one flat list: [N*N tile values][N*N possible number bit masks], value v being bit v-1.
+# Every function does exactly what its SudokuBoard/backTrack counterpart does, in the same order (including where
+# set_value stops on a wipe-out), so the search visits the same nodes and counts the same consistency checks.
+# The constraint counts and the value counts of SudokuBoard are not kept: MRV and MCV both end up picking the last
+# empty tile (neither updates its running minimum/maximum), and LCV counts the tiles allowing a value on demand.
+TEMPLATE = '''# Generated by SudokuKernel.py for %(N)dx%(N)d boards. Do not edit; delete to regenerate.
+
+N = %(N)d
+FULL = %(full)d
+BITS = %(bits)r
+# PAIRS[t]: the tiles of t's column and row, interleaved like the loop of SudokuBoard.set_value
+PAIRS = %(pairs)r
+# BOX[t]: the tiles of t's sub-box, row by row
+BOX = %(box)r
+# LCV[t]: the tiles of t's row, column and sub-box (t itself three times), whose allowed values LCV counts
+LCV = %(lcv)r
+# PEERS[t]: the tiles in t's column, row and sub-box, in the order backTrack checks them without forward checking
+PEERS = %(peers)r
+UNITS = %(units)r
+checks = 0
+
+
+def set_value(s, t, v):
+    global checks
+    checks += 1
+    if s[t]:
+        return False
+    s[t] = v
+    bit = BITS[v]
+    for u in PAIRS[t]:
+        d = s[%(N2)d+u]
+        if d & bit:
+            d ^= bit
+            s[%(N2)d+u] = d
+        if not d and not s[u]:
+            return False
+    for u in BOX[t]:
+        d = s[%(N2)d+u]
+        if d & bit:
+            d ^= bit
+            s[%(N2)d+u] = d
+        if not d and not s[u]:
+            return False
+    s[%(N2)d+t] = 0
+    for u in PAIRS[t]:
+        d = s[%(N2)d+u]
+        if d and not d & (d-1):
+            if not set_value(s, u, d.bit_length()):
+                return False
+    for u in BOX[t]:
+        d = s[%(N2)d+u]
+        if d and not d & (d-1):
+            if not set_value(s, u, d.bit_length()):
+                return False
+    return True
+
+
+def complete(s):
+    if 0 in s[:%(N2)d]:
+        return False
+    for unit in UNITS:
+        mask = 0
+        for u in unit:
+            mask |= BITS[s[u]]
+        if mask != FULL:
+            return False
+    return True
+
+
+def last_empty(s):
+    # selectUnassignedVariable with MRV or MCV: -1 if an empty tile has no possible values
+    tile = %(last)d
+    for u in xrange(%(N2)d):
+        if not s[u]:
+            if not s[%(N2)d+u]:
+                return -1
+            tile = u
+    return tile
+
+
+def first_empty(s, forward_checking):
+    # selectUnassignedVariable without MRV or MCV (forward_checking), or the tile backTrack picks without it
+    for u in xrange(%(N2)d):
+        if not s[u]:
+            if forward_checking and not s[%(N2)d+u]:
+                return -1
+            return u
+    return %(last)d
+
+
+def values(s, t):
+    d = s[%(N2)d+t]
+    return [v for v in xrange(1, %(N)d+1) if d & BITS[v]]
+
+
+def lcv_order(s, t):
+    counts = {}
+    tiles = LCV[t]
+    for v in values(s, t):
+        bit = BITS[v]
+        count = 0
+        for u in tiles:
+            if s[%(N2)d+u] & bit:
+                count += 1
+        counts[v] = count
+    return sorted(counts.keys(), key=counts.__getitem__)
+
+
+def consistent(s, t, v):
+    global checks
+    checks += 1
+    for u in PEERS[t]:
+        if s[u] == v:
+            return False
+    return True
+'''
+
+_loaded = {}
+
+
+def generate_source(size):
+    """Returns the source of the kernel module for size x size boards."""
+    s = int(math.sqrt(size))
+    if s*s != size:
+        raise ValueError("board size must be a perfect square, got "+str(size))
+    N2 = size*size
+    pairs, box, lcv, peers = [], [], [], []
+    for tile in range(N2):
+        row, col = tile/size, tile % size
+        rowTiles = [row*size+i for i in range(size)]
+        colTiles = [i*size+col for i in range(size)]
+        boxTiles = [i*size+j for i in range((row/s)*s, (row/s)*s+s) for j in range((col/s)*s, (col/s)*s+s)]
+        pairs.append(tuple(tile for pair in zip(colTiles, rowTiles) for tile in pair))
+        box.append(tuple(boxTiles))
+        lcv.append(tuple(rowTiles+colTiles+boxTiles))
+        peers.append(tuple(tile for pair in zip(colTiles, rowTiles) for tile in pair)
+                     + tuple(u for u in boxTiles if u/size != row and u % size != col))
+    units = [tuple(r*size+i for i in range(size)) for r in range(size)]
+    units += [tuple(i*size+c for i in range(size)) for c in range(size)]
+    units += [tuple(i*size+j for i in range(br, br+s) for j in range(bc, bc+s))
+              for br in range(0, size, s) for bc in range(0, size, s)]
+    return TEMPLATE % dict(N=size, N2=N2, last=N2-1, full=(1 << size)-1,
+                           bits=tuple([0]+[1 << i for i in range(size)]), pairs=tuple(pairs), box=tuple(box),
+                           lcv=tuple(lcv), peers=tuple(peers), units=tuple(units))
+
+
+def _save(path, codePath, source, code):
+    if not os.path.isdir(CACHE_DIR):
+        try:
+            os.makedirs(CACHE_DIR)
+        except OSError:
+            if not os.path.isdir(CACHE_DIR):
+                raise
+    # written under temporary names and renamed, so a worker never loads a half-written kernel
+    for target, data in [(path, source), (codePath, imp.get_magic()+marshal.dumps(code))]:
+        temporary = "%s.%d.tmp" % (target, os.getpid())
+        f = open(temporary, 'wb')
+        try:
+            f.write(data)
+        finally:
+            f.close()
+        os.rename(temporary, target)
+
+
+def load_kernel(size):
+    """Returns the kernel module for size x size boards. The first time, it is generated into CACHE_DIR as source
+    (to read) and as marshalled compiled code (to load); later runs and other processes only load the code. The
+    cached files are named after a hash of the generated source, so any change to the template or the tables gets
+    a new kernel instead of a stale one. If CACHE_DIR can't be written, the kernel is compiled in memory every time
+    instead."""
+    if size in _loaded:
+        return _loaded[size]
+    # generating the source is cheap next to compiling it, which is what the cache saves
+    source = generate_source(size)
+    name = "sudoku_kernel_%d_%s" % (size, hashlib.sha1(source).hexdigest()[:16])
+    path = os.path.join(CACHE_DIR, name+".py")
+    codePath = os.path.join(CACHE_DIR, name+".code")
+    code = None
+    if os.path.exists(codePath):
+        try:
+            f = open(codePath, 'rb')
+            try:
+                if f.read(len(imp.get_magic())) == imp.get_magic():
+                    code = marshal.load(f)
+            finally:
+                f.close()
+        except (IOError, EOFError, ValueError, TypeError):
+            # unreadable or truncated: compile it again
+            code = None
+    if code is None:
+        code = compile(source, path, 'exec')
+        try:
+            _save(path, codePath, source, code)
+        except (IOError, OSError):
+            # no writable cache (a read-only home, say): use the kernel compiled in memory, just not cached
+            pass
+    module = imp.new_module(name)
+    module.__file__ = path
+    exec code in module.__dict__
+    _loaded[size] = module
+    return module
+
+
+def board_to_state(board):
+    """The kernel search state of a SudokuBoard."""
+    N = board.BoardSize
+    state = [board.CurrentGameBoard[row][col] for row in range(N) for col in range(N)]
+    for row in range(N):
+        for col in range(N):
+            mask = 0
+            for value in board.PossibleNum[row][col]:
+                mask |= 1 << (value-1)
+            state.append(mask)
+    return state
+
+
+def state_to_board(state, size):
+    """The SudokuStarter.filled_board holding the tile values of a kernel search state."""
+    return SudokuStarter.filled_board([state[row*size:(row+1)*size] for row in range(size)])
+
+
+def search_events(initial_board, forward_checking, MRV, MCV, LCV, progress=None):
+    """searchNode with the kernel for the board's size: yields ('solution', SudokuBoard) for every solution in the
+    same order, and ('progress', stats) from progress (a SudokuStarter.SearchProgress) when it is due. Keeps its
+    choice points on an explicit stack instead of recursing."""
+    size = initial_board.BoardSize
+    kernel = load_kernel(size)
+    set_value, complete = kernel.set_value, kernel.complete
+
+    def flush_checks():
+        SudokuStarter.consistencyChecks += kernel.checks
+        kernel.checks = 0
+
+    stack = []     # [state, tile, values, number of values tried]
+    node = board_to_state(initial_board)
+    try:
+        while True:
+            if progress is not None:
+                progress.nodes += 1
+                if len(stack) > progress.maxDepth:
+                    progress.deeper(len(stack))
+                if time.time() >= progress.nextReport:
+                    flush_checks()
+                    yield 'progress', progress.stats(len(stack))
+            if complete(node):
+                flush_checks()
+                yield 'solution', state_to_board(node, size)
+            else:
+                if not forward_checking:
+                    tile = kernel.first_empty(node, False)
+                elif MRV or MCV:
+                    tile = kernel.last_empty(node)
+                else:
+                    tile = kernel.first_empty(node, True)
+                if tile != -1:
+                    stack.append([node, tile, kernel.lcv_order(node, tile) if LCV and forward_checking
+                                  else kernel.values(node, tile), 0])
+            # move on to the next value of the deepest choice point that has one left
+            node = None
+            while stack and node is None:
+                frame = stack[-1]
+                if frame[3] == len(frame[2]):
+                    stack.pop()
+                    continue
+                value = frame[2][frame[3]]
+                frame[3] += 1
+                if forward_checking:
+                    node = frame[0][:]
+                    set_value(node, frame[1], value)
+                elif kernel.consistent(frame[0], frame[1], value):
+                    node = frame[0][:]
+                    node[frame[1]] = value
+                    node[size*size+frame[1]] = 0
+            if node is None:
+                return
+    finally:
+        flush_checks()
+
+
+if __name__ == '__main__':
+    # usage: SudokuKernel.py puzzle_file...   compares solve() with and without the kernels
+    for fileName in sys.argv[1:] or ["input_puzzles/more/16x16/16x16.2.sudoku", "input_puzzles/more/16x16/16x16.4.sudoku"]:
+        times = []
+        for kernels in [False, True]:
+            board = SudokuStarter.init_board(fileName)
+            SudokuStarter.consistencyChecks = 0
+            start = time.time()
+            result = next(SudokuStarter.iter_solutions(board, kernels=kernels), False)
+            times.append((time.time()-start, SudokuStarter.consistencyChecks))
+        print "%s: generic %.3g s (%d checks), kernel %.3g s (%d checks), %.1fx" % (
+            fileName, times[0][0], times[0][1], times[1][0], times[1][1], times[0][0]/times[1][0])
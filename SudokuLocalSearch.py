@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Anytime local search for boards too large for backTrack: simulated annealing over box-consistent fillings.
+
+import math, random, sys, time
+import SudokuStarter
+
+# cooling factor applied after every chain of moves, and how many chains without a new best before reheating
+COOLING = 0.995
+PATIENCE = 500
+
+
+def _fill_box(board, tiles, values, rng):
+    """Places values on the empty tiles of a sub-box, each on a tile that still has it in PossibleNum when
+    possible (a matching of tiles to values, found with augmenting paths). Returns {tile: value}."""
+    owner = {}
+
+    def augment(tile, seen):
+        for value in board.PossibleNum[tile[0]][tile[1]]:
+            if value in values and value not in seen:
+                seen.add(value)
+                if value not in owner or augment(owner[value], seen):
+                    owner[value] = tile
+                    return True
+        return False
+    shuffled = list(tiles)
+    rng.shuffle(shuffled)
+    for tile in shuffled:
+        augment(tile, set())
+    filling = dict((tile, value) for value, tile in owner.items())
+    # without a perfect matching the box can't be filled within its domains; the rest goes anywhere
+    left = [value for value in values if value not in owner]
+    rng.shuffle(left)
+    for tile in shuffled:
+        if tile not in filling:
+            filling[tile] = left.pop()
+    return filling
+
+
+class AnnealingState(object):
+    """A filling of the board where every sub-box holds each value once. Fixed tiles keep their values; the
+    others only move by swapping values inside their box. The cost is the number of values missing from the
+    rows plus those missing from the columns, so it is 0 exactly for a solution."""
+
+    def __init__(self, board, rng):
+        N = board.BoardSize
+        s = board.squareSize
+        self.size = N
+        self.grid = [list(row) for row in board.CurrentGameBoard]
+        self.boxes = []     # per box with two or more free tiles: ([free tiles], {tile: PossibleNum as a set})
+        for boxRow in range(0, N, s):
+            for boxCol in range(0, N, s):
+                tiles = [(row, col) for row in range(boxRow, boxRow+s) for col in range(boxCol, boxCol+s)]
+                free = [tile for tile in tiles if self.grid[tile[0]][tile[1]] == 0]
+                if len(free) < 2:
+                    if free:
+                        # a lone empty tile can only take the value its box is missing
+                        missing = set(range(1, N+1))-set(self.grid[row][col] for row, col in tiles)
+                        self.grid[free[0][0]][free[0][1]] = missing.pop()
+                    continue
+                values = set(range(1, N+1))-set(self.grid[row][col] for row, col in tiles)
+                for (row, col), value in _fill_box(board, free, values, rng).items():
+                    self.grid[row][col] = value
+                self.boxes.append((free, dict((tile, set(board.PossibleNum[tile[0]][tile[1]])) for tile in free)))
+        self.rowCount = [[0]*(N+1) for i in range(N)]
+        self.colCount = [[0]*(N+1) for i in range(N)]
+        for row in range(N):
+            for col in range(N):
+                self.rowCount[row][self.grid[row][col]] += 1
+                self.colCount[col][self.grid[row][col]] += 1
+        self.cost = sum(counts[1:].count(0) for counts in self.rowCount+self.colCount)
+
+    def conflicting(self, tile):
+        row, col = tile
+        value = self.grid[row][col]
+        return self.rowCount[row][value] > 1 or self.colCount[col][value] > 1
+
+    def pick_move(self, rng):
+        """A random swap (tile, tile) of two free tiles of a box, the first of them one whose value is repeated in
+        its row or column if the box has one. The second is one whose value is allowed on the first tile and
+        the other way round, if there is one: values outside PossibleNum always conflict with a fixed tile, but
+        a few such swaps are needed to reach fillings that only differ by a longer cycle of values."""
+        grid = self.grid
+        free, allowed = rng.choice(self.boxes)
+        first = rng.choice([tile for tile in free if self.conflicting(tile)] or free)
+        value, allowedFirst = grid[first[0]][first[1]], allowed[first]
+        partners = [tile for tile in free if tile != first]
+        partners = [tile for tile in partners if grid[tile[0]][tile[1]] in allowedFirst
+                    and value in allowed[tile]] or partners
+        return first, rng.choice(partners)
+
+    def delta(self, first, second):
+        """The change of cost if the values of the two tiles (in the same box) were swapped."""
+        (row1, col1), (row2, col2) = first, second
+        a, b = self.grid[row1][col1], self.grid[row2][col2]
+        change = 0
+        if row1 != row2:
+            counts = self.rowCount[row1]
+            change += (counts[a] == 1) - (counts[b] == 0)
+            counts = self.rowCount[row2]
+            change += (counts[b] == 1) - (counts[a] == 0)
+        if col1 != col2:
+            counts = self.colCount[col1]
+            change += (counts[a] == 1) - (counts[b] == 0)
+            counts = self.colCount[col2]
+            change += (counts[b] == 1) - (counts[a] == 0)
+        return change
+
+    def swap(self, first, second, change):
+        (row1, col1), (row2, col2) = first, second
+        a, b = self.grid[row1][col1], self.grid[row2][col2]
+        self.grid[row1][col1], self.grid[row2][col2] = b, a
+        self.rowCount[row1][a] -= 1
+        self.rowCount[row1][b] += 1
+        self.rowCount[row2][b] -= 1
+        self.rowCount[row2][a] += 1
+        self.colCount[col1][a] -= 1
+        self.colCount[col1][b] += 1
+        self.colCount[col2][b] -= 1
+        self.colCount[col2][a] += 1
+        self.cost += change
+
+
+def search_events(initial_board, seconds, rng=random, progress=None):
+    """Simulated annealing from the propagated domains of initial_board for at most seconds. Yields
+    ('progress', stats) from progress (a SudokuStarter.SearchProgress, stats gaining the best 'conflicts' so
+    far) when it is due, and finally ('solution', board) if it found a solution (checked with is_complete) or
+    ('best', {board, conflicts}) with the best filling found and its number of row and column conflicts.
+    Yields nothing if an empty tile of initial_board has no possible values left. Every swap it evaluates
+    counts as a consistency check."""
+    N = initial_board.BoardSize
+    if [1 for row in range(N) for col in range(N)
+            if initial_board.CurrentGameBoard[row][col] == 0 and not initial_board.PossibleNum[row][col]]:
+        return
+    deadline = time.time()+seconds
+    state = AnnealingState(initial_board, rng)
+    best, bestGrid = state.cost, [row[:] for row in state.grid]
+    evaluated = 0
+    if state.boxes and state.cost:
+        # starting temperature: the spread of the cost changes of random moves
+        changes = [state.delta(*state.pick_move(rng)) for i in range(200)]
+        mean = float(sum(changes))/len(changes)
+        hot = max(math.sqrt(sum((change-mean)**2 for change in changes)/len(changes)), 0.5)
+        temperature = hot
+        chain = sum(len(free) for free, allowed in state.boxes)
+        stale = 0
+        while state.cost and time.time() < deadline:
+            for i in xrange(chain):
+                move = state.pick_move(rng)
+                evaluated += 1
+                change = state.delta(*move)
+                if change <= 0 or rng.random() < math.exp(-change/temperature):
+                    state.swap(move[0], move[1], change)
+                    if state.cost < best:
+                        best, bestGrid = state.cost, [row[:] for row in state.grid]
+                        stale = -1
+                        if not best:
+                            break
+            stale += 1
+            temperature *= COOLING
+            if stale >= PATIENCE:
+                temperature, stale = hot, 0
+            SudokuStarter.consistencyChecks += evaluated
+            evaluated = 0
+            if progress is not None:
+                progress.nodes += chain
+                if time.time() >= progress.nextReport:
+                    stats = progress.stats(0)
+                    stats['conflicts'] = best
+                    yield 'progress', stats
+    SudokuStarter.consistencyChecks += evaluated
+    board = SudokuStarter.filled_board(bestGrid)
+    if best == 0 and SudokuStarter.is_complete(board):
+        yield 'solution', board
+    else:
+        yield 'best', dict(board=board, conflicts=best)
+
+
+def anneal(initial_board, seconds=60, rng=random):
+    """Returns (solution board, 0) if simulated annealing solves initial_board within seconds, otherwise (best
+    board found, its number of conflicts); (False, None) if propagation already showed there is no solution."""
+    for kind, payload in search_events(initial_board, seconds, rng):
+        if kind == 'solution':
+            return payload, 0
+        if kind == 'best':
+            return payload['board'], payload['conflicts']
+    return False, None
+
+
+if __name__ == '__main__':
+    # usage: SudokuLocalSearch.py puzzle_file [seconds]
+    fileName = sys.argv[1] if len(sys.argv) > 1 else "input_puzzles/easy/25_25.sudoku"
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 60
+    start = time.time()
+    board, conflicts = anneal(SudokuStarter.init_board(fileName), seconds)
+    if board == False:
+        print "Error! Board cannot be solved"
+    else:
+        board.print_board()
+        print "%d conflict(s) after %.3g second(s)" % (conflicts, time.time()-start)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Profiling for solve() and solve_batch(): per-phase timers, optional cProfile, and collapsed-stack output.
+
+import copy, cProfile, sys
+from contextlib import contextmanager
+from timeit import default_timer
+import SudokuStarter
+
+# the phases of the search that are timed: (owner, attribute name)
+SOLVE_PHASES = [(SudokuStarter, 'is_complete'),
+                (SudokuStarter, 'selectUnassignedVariable'), (SudokuStarter, 'orderDomainValues'),
+                (copy, 'deepcopy')]
+
+
+class Profiler(object):
+    """Collects the time spent in each phase of a solve, keyed by the stack of phases it was called from.
+    The timed functions are only swapped in while profiling() is active, so nothing is timed (and nothing
+    slows down) otherwise. Recursive calls of a phase are counted as part of the outermost call."""
+
+    def __init__(self, cprofile=False):
+        self.times = {}     # (phase, phase, ...) -> inclusive seconds
+        self.calls = {}     # (phase, phase, ...) -> number of calls
+        self.cprofile = cProfile.Profile() if cprofile else None
+        self._stack = []
+
+    def _timed(self, name, function):
+        stack = self._stack
+        times = self.times
+        calls = self.calls
+
+        def timed(*args, **kwargs):
+            if stack and stack[-1] == name:
+                return function(*args, **kwargs)
+            stack.append(name)
+            key = tuple(stack)
+            start = default_timer()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                times[key] = times.get(key, 0.0)+default_timer()-start
+                calls[key] = calls.get(key, 0)+1
+                stack.pop()
+        return timed
+
+    @contextmanager
+    def profiling(self, root, boardClasses=(), phases=()):
+        """Times everything inside the with block as phase root, and the SOLVE_PHASES, the set_value of every
+        class in boardClasses and any extra (owner, attribute name) phases inside it."""
+        targets = SOLVE_PHASES+[(boardClass, 'set_value') for boardClass in boardClasses]+list(phases)
+        saved = []
+        for owner, name in targets:
+            saved.append((owner, name, vars(owner).get(name)))
+            setattr(owner, name, self._timed(name, getattr(owner, name)))
+        self._stack.append(root)
+        start = default_timer()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+        try:
+            yield self
+        finally:
+            if self.cprofile is not None:
+                self.cprofile.disable()
+            key = tuple(self._stack)
+            self.times[key] = self.times.get(key, 0.0)+default_timer()-start
+            self.calls[key] = self.calls.get(key, 0)+1
+            self._stack.pop()
+            for owner, name, original in reversed(saved):
+                if original is None:
+                    delattr(owner, name)
+                else:
+                    setattr(owner, name, original)
+
+    def self_times(self):
+        """Seconds spent in each stack itself, not counting the phases called from it."""
+        result = dict(self.times)
+        for key, seconds in self.times.items():
+            if len(key) > 1 and key[:-1] in result:
+                result[key[:-1]] -= seconds
+        return result
+
+    def phase_totals(self):
+        """{phase: (inclusive seconds, self seconds, calls)} summed over all the stacks a phase appears in."""
+        selfTimes = self.self_times()
+        totals = {}
+        for key, seconds in self.times.items():
+            inclusive, exclusive, calls = totals.get(key[-1], (0.0, 0.0, 0))
+            # don't count a phase twice when it is called again from one of its own callees
+            if key[-1] in key[:-1]:
+                seconds = 0.0
+            totals[key[-1]] = (inclusive+seconds, exclusive+selfTimes[key], calls+self.calls[key])
+        return totals
+
+    def report(self, out=sys.stdout):
+        """Prints one line per phase: inclusive seconds, self seconds and number of calls."""
+        totals = self.phase_totals()
+        out.write("%-26s %12s %12s %10s\n" % ("phase", "total (s)", "self (s)", "calls"))
+        for name in sorted(totals, key=lambda name: -totals[name][0]):
+            out.write("%-26s %12.6f %12.6f %10d\n" % ((name,)+totals[name]))
+
+    def write_collapsed(self, filename):
+        """Writes the self time of every stack in the collapsed-stack format of flamegraph.pl and speedscope:
+        one "phase;phase;phase microseconds" line per stack."""
+        f = open(filename, 'w')
+        for key, seconds in sorted(self.self_times().items()):
+            f.write("%s %d\n" % (";".join(key), max(int(round(seconds*1e6)), 0)))
+        f.close()
+
+    def write_cprofile(self, filename):
+        """Writes the cProfile statistics (for pstats, snakeviz, gprof2dot, ...)."""
+        if self.cprofile is None:
+            raise ValueError("this Profiler was created without cprofile=True")
+        self.cprofile.dump_stats(filename)
+
+
+def as_profiler(profile):
+    """Turns the profile argument of solve()/solve_batch() into a Profiler: True makes a new one."""
+    return profile if isinstance(profile, Profiler) else Profiler()
+
+
+if __name__ == '__main__':
+    # usage: SudokuProfile.py puzzle_file [collapsed output] [cProfile output]
+    import SudokuProfile    # solve() checks for SudokuProfile.Profiler, not the one of __main__
+    board = SudokuStarter.init_board(sys.argv[1])
+    profiler = SudokuProfile.Profiler(cprofile=len(sys.argv) > 3)
+    SudokuStarter.solve(board, profile=profiler)
+    profiler.report()
+    if len(sys.argv) > 2:
+        profiler.write_collapsed(sys.argv[2])
+    if len(sys.argv) > 3:
+        profiler.write_cprofile(sys.argv[3])
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Board rendering into one string per board, and a buffered writer for dumping many boards at once.
+
+import math, os, sys, time
+import SudokuStarter
+
+
+_tables = {}
+
+
+def _tables_for(N):
+    # the strings the renderers put together, made once per board size: the text of every value in a box and
+    # on its own, the box lines, and the "row<TAB>col<TAB>" start of every tile's line in the file format
+    if N not in _tables:
+        div = int(math.sqrt(N))
+        _tables[N] = dict(div=div, cells=[" %2s " % (value or "") for value in range(N+1)],
+                          values=[str(value) for value in range(N+1)],
+                          line="+"+("-"*(4*div)+"+")*div, sep="|"+(" "*(4*div)+"|")*div,
+                          tiles=[["%d\t%d\t" % (row+1, col+1) for col in range(N)] for row in range(N)])
+    return _tables[N]
+
+
+def render_pretty(board):
+    """The boxed layout of print_board (the exact same text, trailing newline included)."""
+    N = board.BoardSize
+    tables = _tables_for(N)
+    div, cells, line, sep = tables['div'], tables['cells'], tables['line'], tables['sep']
+    parts = [line]
+    for i in range(N):
+        row = [cells[value] for value in board.CurrentGameBoard[i]]
+        parts.append("|"+"|".join(["".join(row[box:box+div]) for box in range(0, N, div)])+"|")
+        parts.append(line if (i+1) % div == 0 else sep)
+    parts.append("")
+    return "\n".join(parts)
+
+
+def render_line(board):
+    """One line: the tile values row by row separated by spaces, 0 for an empty tile."""
+    values = _tables_for(board.BoardSize)['values']
+    return " ".join([values[value] for row in board.CurrentGameBoard for value in row])+"\n"
+
+
+def render_clues(board):
+    """The input_puzzles file format: the size, the number of filled tiles, then row col value (one-indexed,
+    tab separated) per filled tile."""
+    N = board.BoardSize
+    tables = _tables_for(N)
+    values, tiles = tables['values'], tables['tiles']
+    lines = [tiles[row][col]+values[value] for row in range(N)
+             for col, value in enumerate(board.CurrentGameBoard[row]) if value]
+    return "%d\n%d\n%s\n" % (N, len(lines), "\n".join(lines)) if lines else "%d\n0\n" % N
+
+FORMATS = {'pretty': render_pretty, 'line': render_line, 'clues': render_clues}
+
+
+class BoardWriter(object):
+    """Writes rendered boards to out (an open file, stdout by default) in big chunks: the text of the boards is
+    collected until there is at least bufferSize characters of it, which then goes out in a single write.
+    separator is written after every board."""
+
+    def __init__(self, out=None, format='pretty', bufferSize=1 << 20, separator=""):
+        self.out = out if out is not None else sys.stdout
+        self.render = FORMATS[format]
+        self.bufferSize = bufferSize
+        self.separator = separator
+        self.parts = []
+        self.buffered = 0
+        self.boards = 0
+
+    def write(self, board):
+        text = self.render(board)+self.separator
+        self.parts.append(text)
+        self.buffered += len(text)
+        self.boards += 1
+        if self.buffered >= self.bufferSize:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.out.write("".join(self.parts))
+            self.parts = []
+            self.buffered = 0
+        self.out.flush()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_boards(boards, filename=None, format='pretty', separator=""):
+    """Writes every board of the iterable boards to the file filename (stdout if None) with a BoardWriter.
+    Returns the number of boards written."""
+    out = open(filename, 'w') if filename is not None else sys.stdout
+    try:
+        with BoardWriter(out, format, separator=separator) as writer:
+            for board in boards:
+                writer.write(board)
+        return writer.boards
+    finally:
+        if filename is not None:
+            out.close()
+
+
+if __name__ == '__main__':
+    # usage: SudokuRender.py [puzzle_file] [copies] [format]   times print_board against the BoardWriter
+    fileName = sys.argv[1] if len(sys.argv) > 1 else "input_puzzles/easy/25_25.sudoku"
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    format = sys.argv[3] if len(sys.argv) > 3 else 'pretty'
+    board = SudokuStarter.init_board(fileName)
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    start = time.time()
+    for i in range(copies):
+        board.print_board()
+    printTime = time.time()-start
+    sys.stdout = stdout
+    start = time.time()
+    write_boards([board]*copies, os.devnull, format)
+    writeTime = time.time()-start
+    print "%d boards: print_board %.3g s, BoardWriter (%s) %.3g s" % (copies, printTime, format, writeTime)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Scaling benchmark: solves generated puzzles of growing size with every solve() configuration and records
+# time, peak memory and consistency checks against the board size.
+
+import multiprocessing, os, Queue, random, sys, time
+import SudokuStarter, SudokuGenerator
+
+# solve() configurations: name -> (forward_checking, MRV, MCV, LCV)
+CONFIGS = [
+    ("FC+MRV+LCV", (True, True, False, True)),
+    ("FC+MRV", (True, True, False, False)),
+    ("FC+MCV", (True, False, True, False)),
+    ("FC+LCV", (True, False, False, True)),
+    ("FC", (True, False, False, False)),
+    ("BT", (False, False, False, False)),
+    ("LS", (True, True, False, True)),
+]
+# configurations that use the local search of SudokuLocalSearch instead of backTrack, given most of the timeout
+LOCAL_SEARCH = set(["LS"])
+SIZES = [4, 9, 16, 25, 36, 49, 64]
+FIELDS = ["size", "config", "clues", "seconds", "peak_kb", "consistency_checks", "result"]
+
+
+def _solve_worker(puzzle, args, options, queue):
+    # runs in its own process so that its peak memory can be measured and it can be killed on timeout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        import resource
+    except ImportError:
+        # no resource module (Windows): the peak memory is left out
+        resource = None
+    startMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else None
+    size = len(puzzle)
+    board = SudokuStarter.SudokuBoard(size, [[0]*size for i in range(size)])
+    for row in range(size):
+        for col in range(size):
+            if puzzle[row][col]:
+                board.set_value(row, col, puzzle[row][col])
+    SudokuStarter.consistencyChecks = 0
+    start = time.time()
+    result = SudokuStarter.solve(board, *args, **options)
+    seconds = time.time()-start
+    solved = result != False and SudokuStarter.is_complete(result)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss-startMemory if resource is not None else None
+    queue.put((seconds, peak, SudokuStarter.consistencyChecks, "solved" if solved else "failed"))
+
+
+def run_one(puzzle, args, timeout, options={}):
+    """Solves puzzle with the given solve() arguments (and keyword options) in a child process. Returns
+    (seconds, peak_kb, consistency_checks, result); result is "timeout" (and the rest None) if it took longer
+    than timeout, and "error" if the solve died with an exception (MemoryLimitExceeded, say)."""
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_solve_worker, args=(puzzle, args, options, queue))
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return None, None, None, "timeout"
+    try:
+        # the process has exited, so whatever it put is there already
+        return queue.get(timeout=1 if process.exitcode == 0 else 0)
+    except Queue.Empty:
+        return None, None, None, "error"
+
+
+def run_scaling(sizes=SIZES, configs=CONFIGS, density=0.5, puzzles=3, timeout=60, seed=0, unique=False):
+    """Generates puzzles of every size and solves each with every configuration. Returns a list of dicts with
+    the FIELDS keys. Once a configuration times out on every puzzle of a size, larger sizes are skipped for it."""
+    rng = random.Random(seed)
+    rows = []
+    givenUp = set()
+    for size in sizes:
+        generated = [SudokuGenerator.generate_puzzle(size, density, unique, rng) for i in range(puzzles)]
+        for name, args in configs:
+            if name in givenUp:
+                continue
+            timeouts = 0
+            # the local search stops itself before the timeout and reports its best filling as "failed"
+            options = dict(localSearch=0.8*timeout) if name in LOCAL_SEARCH else {}
+            for puzzle in generated:
+                seconds, peak, checks, result = run_one(puzzle, args, timeout, options)
+                timeouts += result == "timeout"
+                rows.append(dict(size=size, config=name, clues=sum(1 for row in puzzle for value in row if value),
+                                 seconds=seconds, peak_kb=peak, consistency_checks=checks, result=result))
+            if timeouts == len(generated):
+                givenUp.add(name)
+    return rows
+
+
+def write_csv(rows, filename):
+    f = open(filename, 'w')
+    f.write(",".join(FIELDS)+"\n")
+    for row in rows:
+        f.write(",".join("" if row[field] is None else str(row[field]) for field in FIELDS)+"\n")
+    f.close()
+
+
+def plot(rows, filename):
+    """Plots median time, peak memory and consistency checks against board size, one line per configuration.
+    Needs matplotlib; returns False without it."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return False
+    figure, axes = plt.subplots(1, 3, figsize=(15, 4))
+    for axis, field, label in zip(axes, ["seconds", "peak_kb", "consistency_checks"],
+                                  ["time (s)", "peak memory (KB)", "consistency checks"]):
+        for name, args in CONFIGS:
+            points = {}
+            for row in rows:
+                if row["config"] == name and row["result"] == "solved" and row[field] is not None:
+                    points.setdefault(row["size"], []).append(row[field])
+            sizes = sorted(points)
+            if sizes:
+                axis.plot(sizes, [sorted(points[size])[len(points[size])/2] for size in sizes], marker="o", label=name)
+        axis.set_xlabel("board size N")
+        axis.set_ylabel(label)
+        axis.set_yscale("log")
+    axes[0].legend()
+    figure.tight_layout()
+    figure.savefig(filename)
+    return True
+
+
+if __name__ == '__main__':
+    # usage: SudokuScaling.py [largest size] [timeout per solve in seconds] [output prefix]
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    timeout = float(sys.argv[2]) if len(sys.argv) > 2 else 60
+    prefix = sys.argv[3] if len(sys.argv) > 3 else "scaling"
+    rows = run_scaling([size for size in SIZES if size <= largest], timeout=timeout)
+    write_csv(rows, prefix+".csv")
+    for row in rows:
+        print "%(size)3d %(config)-11s %(result)-8s %(seconds)s s, %(peak_kb)s KB, %(consistency_checks)s checks" % row
+    if not plot(rows, prefix+".png"):
+        print "matplotlib is not installed, only wrote "+prefix+".csv"
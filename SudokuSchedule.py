@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Parallel batch solves of a mixed corpus, scheduled longest-expected-first by a cost model that learns from
+# the actual solve times.
+
+import glob, json, math, multiprocessing, os, sys, time
+import SudokuStarter
+
+# what the cost model predicts log(seconds) from: all of it is known after parse_file's propagation. Fractions of
+# the board rather than counts, since how hard a puzzle is depends on how empty it is for its size.
+FEATURES = ["bias", "size", "empty_fraction", "log_space_per_tile"]
+# a start fitted to input_puzzles/more on one core with a 20 s limit; refit replaces it once there are records
+DEFAULT_WEIGHTS = [-8.83, 0.24, -17.73, 12.89]
+# how strongly refit pulls the weights back towards the previous ones
+RIDGE = 0.01
+# refit passes: each one raises the targets of the censored records to what the weights of the pass before predict
+CENSORED_PASSES = 10
+
+
+def puzzle_features(board):
+    """The FEATURES of a parsed (and propagated) board: 1, board size, the fraction of its tiles that is empty
+    and the log2 of the number of fillings the PossibleNum of the empty tiles still allow, per tile."""
+    N = board.BoardSize
+    empty = 0
+    space = 0.0
+    for row in range(N):
+        for col in range(N):
+            if board.CurrentGameBoard[row][col] == 0:
+                empty += 1
+                space += math.log(max(len(board.PossibleNum[row][col]), 1), 2)
+    return [1.0, float(N), float(empty)/(N*N), space/(N*N)]
+
+
+def _solve_linear(matrix, vector):
+    # Gaussian elimination with partial pivoting; matrix is square and (with the ridge term) never singular
+    n = len(vector)
+    rows = [matrix[i][:]+[vector[i]] for i in range(n)]
+    for i in range(n):
+        pivot = max(range(i, n), key=lambda k: abs(rows[k][i]))
+        rows[i], rows[pivot] = rows[pivot], rows[i]
+        for k in range(i+1, n):
+            factor = rows[k][i]/rows[i][i]
+            for j in range(i, n+1):
+                rows[k][j] -= factor*rows[i][j]
+    solution = [0.0]*n
+    for i in reversed(range(n)):
+        solution[i] = (rows[i][n]-sum(rows[i][j]*solution[j] for j in range(i+1, n)))/rows[i][i]
+    return solution
+
+
+class CostModel(object):
+    """Predicts the seconds a puzzle takes as exp(weights . features). Every solve adds a record of its features
+    and predicted and actual seconds; refit fits the weights to the records (least squares on the log of the
+    seconds, pulled towards the previous weights so that a few records don't throw them far off). A record of a
+    solve stopped by the time limit is censored: its actual seconds are only a lower bound, so refit fits it to
+    the larger of them and the prediction, and error leaves it out."""
+
+    def __init__(self, weights=None, records=None):
+        self.weights = list(weights or DEFAULT_WEIGHTS)
+        self.records = list(records or [])
+
+    def predict(self, features):
+        return math.exp(sum(weight*feature for weight, feature in zip(self.weights, features)))
+
+    def record(self, features, predicted, actual, censored=False):
+        self.records.append(dict(features=features, predicted=predicted, actual=actual, censored=censored))
+
+    def timed(self):
+        """The records that aren't censored."""
+        return [record for record in self.records if not record.get('censored')]
+
+    def refit(self):
+        n = len(FEATURES)
+        previous = self.weights
+        for iteration in range(CENSORED_PASSES if len(self.timed()) < len(self.records) else 1):
+            matrix = [[RIDGE if i == j else 0.0 for j in range(n)] for i in range(n)]
+            vector = [RIDGE*weight for weight in previous]
+            for record in self.records:
+                x, actual = record['features'], record['actual']
+                if record.get('censored'):
+                    actual = max(actual, self.predict(x))
+                y = math.log(max(actual, 1e-6))
+                for i in range(n):
+                    vector[i] += x[i]*y
+                    for j in range(n):
+                        matrix[i][j] += x[i]*x[j]
+            self.weights = _solve_linear(matrix, vector)
+
+    def error(self):
+        """The median factor between predicted and actual seconds over the records that aren't censored (1.0 is
+        perfect), or None if there are none."""
+        factors = sorted(math.exp(abs(math.log(max(record['predicted'], 1e-6)/max(record['actual'], 1e-6))))
+                         for record in self.timed())
+        return factors[len(factors)/2] if factors else None
+
+    def save(self, filename):
+        f = open(filename, 'w')
+        json.dump(dict(features=FEATURES, weights=self.weights, records=self.records), f)
+        f.close()
+
+    @classmethod
+    def load(cls, filename):
+        """The model saved in filename, or a new one if there is no such file."""
+        if not os.path.exists(filename):
+            return cls()
+        f = open(filename, 'r')
+        state = json.load(f)
+        f.close()
+        if state.get('features') != FEATURES:
+            return cls(records=[])
+        return cls(state['weights'], state['records'])
+
+
+def plan_chunks(jobs, workers):
+    """Splits (predicted seconds, job) pairs into chunks handed out to workers one at a time: longest predicted
+    first, and every chunk worth about the predicted cost still left over 2*workers (at least one job), so the
+    long puzzles go alone at the start and the short ones in growing groups at the end."""
+    jobs = sorted(jobs, key=lambda job: -job[0])
+    remaining = sum(cost for cost, job in jobs)
+    chunks = []
+    current, currentCost = [], 0.0
+    for cost, job in jobs:
+        if current and currentCost+cost > remaining/(2*workers):
+            chunks.append(current)
+            remaining -= currentCost
+            current, currentCost = [], 0.0
+        current.append(job)
+        currentCost += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _solve_chunk(arguments):
+    # runs in a worker: solves every (index, file name) of the chunk and times it; with a corpus file the
+    # boards come from its shared mapping instead of being parsed again
+    chunk, options, timeLimit, corpus = arguments
+    if corpus is not None:
+        import SudokuShared
+        corpus = SudokuShared.open_corpus(corpus)
+    results = []
+    for index, fileName in chunk:
+        board = corpus.board(index) if corpus is not None else SudokuStarter.init_board(fileName)
+        SudokuStarter.consistencyChecks = 0
+        start = time.time()
+        outcome = "failed"
+        for kind, payload in SudokuStarter.solve_events(board, *options, progressInterval=1.0):
+            if kind == 'solution':
+                outcome = "solved"
+                break
+            if kind == 'progress' and timeLimit is not None and payload['elapsed'] > timeLimit:
+                outcome = "timeout"
+                break
+        results.append((index, time.time()-start, SudokuStarter.consistencyChecks, outcome))
+    return results
+
+
+def run_batch(fileNames, workers=None, model=None, options=(True, True, False, True), order="cost",
+              timeLimit=None, corpus=None):
+    """Solves every file in a pool of workers (one per CPU by default) and returns (records, makespan seconds).
+    order="cost" schedules by the predictions of model (a CostModel, new if None) with plan_chunks; order="file"
+    hands the files out one by one in the given order. Each record is a dict of file, features, predicted and
+    actual seconds, consistency checks and outcome ("solved", "failed" or "timeout" after timeLimit seconds);
+    they are also added to the model, which is refitted afterwards. corpus names a SudokuShared corpus file
+    built from fileNames (in the same order), which the workers then map and take the boards from."""
+    workers = workers or multiprocessing.cpu_count()
+    model = model or CostModel()
+    if corpus is not None:
+        import SudokuShared
+        shared = SudokuShared.open_corpus(corpus)
+        features = [puzzle_features(shared.board(i)) for i in range(len(fileNames))]
+    else:
+        features = [puzzle_features(SudokuStarter.init_board(fileName)) for fileName in fileNames]
+    # a solve never takes longer than the time limit
+    predicted = [min(model.predict(x), timeLimit or float('inf')) for x in features]
+    if order == "cost":
+        chunks = plan_chunks([(predicted[i], (i, fileNames[i])) for i in range(len(fileNames))], workers)
+    else:
+        chunks = [[(i, fileNames[i])] for i in range(len(fileNames))]
+    start = time.time()
+    pool = multiprocessing.Pool(workers)
+    try:
+        # imap_unordered hands the chunks out in order, each to the next worker that is free
+        results = [result for chunkResults in pool.imap_unordered(_solve_chunk, [(chunk, options, timeLimit,
+                                                                                  corpus) for chunk in chunks])
+                   for result in chunkResults]
+    finally:
+        pool.close()
+        pool.join()
+    makespan = time.time()-start
+    records = []
+    for index, seconds, checks, outcome in sorted(results):
+        model.record(features[index], predicted[index], seconds, outcome == "timeout")
+        records.append(dict(file=fileNames[index], features=features[index], predicted=predicted[index],
+                            actual=seconds, consistency_checks=checks, result=outcome))
+    model.refit()
+    return records, makespan
+
+
+def simulate_makespan(chunks, seconds, workers):
+    """The makespan of handing out chunks (lists of job indexes) in order to whichever of workers is free first,
+    if job i takes seconds[i]: what the schedule would give on a machine with that many free cores."""
+    free = [0.0]*workers
+    for chunk in chunks:
+        first = free.index(min(free))
+        free[first] += sum(seconds[i] for i in chunk)
+    return max(free)
+
+
+def compare_makespan(fileNames, workers=None, model=None, timeLimit=None):
+    """Runs the batch in file order and then scheduled by cost. Returns (file order makespan, cost order
+    makespan, the records of the cost-ordered run)."""
+    model = model or CostModel()
+    fileRecords, fileMakespan = run_batch(fileNames, workers, model, order="file", timeLimit=timeLimit)
+    costRecords, costMakespan = run_batch(fileNames, workers, model, order="cost", timeLimit=timeLimit)
+    return fileMakespan, costMakespan, costRecords
+
+
+def compare_simulated(records, workers):
+    """simulate_makespan of the file order and of the cost order for the actual seconds of records (from
+    run_batch), so the two schedules can be compared for any number of workers on one machine."""
+    seconds = [record['actual'] for record in records]
+    fileChunks = [[i] for i in range(len(records))]
+    costChunks = plan_chunks([(records[i]['predicted'], i) for i in range(len(records))], workers)
+    return simulate_makespan(fileChunks, seconds, workers), simulate_makespan(costChunks, seconds, workers)
+
+
+def compare_cross_validated(records, workers, timeLimit=None):
+    """Like compare_simulated, but with the cost order planned from leave-one-out predictions: every puzzle's
+    cost predicted by a model fitted (from zero weights) to the records of all the other puzzles only, so the
+    schedule gets no help from the puzzle's own time. timeLimit caps the predictions like in run_batch."""
+    seconds = [record['actual'] for record in records]
+    predicted = []
+    for i in range(len(records)):
+        model = CostModel([0.0]*len(FEATURES))
+        for k, record in enumerate(records):
+            if k != i:
+                model.record(record['features'], record['predicted'], record['actual'],
+                             record['result'] == "timeout")
+        model.refit()
+        predicted.append(min(model.predict(records[i]['features']), timeLimit or float('inf')))
+    costChunks = plan_chunks([(predicted[i], i) for i in range(len(records))], workers)
+    return (simulate_makespan([[i] for i in range(len(records))], seconds, workers),
+            simulate_makespan(costChunks, seconds, workers))
+
+
+if __name__ == '__main__':
+    # usage: SudokuSchedule.py [puzzle directory] [workers] [model file] [time limit per puzzle]
+    directory = sys.argv[1] if len(sys.argv) > 1 else "input_puzzles/more"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    modelFile = sys.argv[3] if len(sys.argv) > 3 else "cost_model.json"
+    timeLimit = float(sys.argv[4]) if len(sys.argv) > 4 else None
+    fileNames = sorted(glob.glob(os.path.join(directory, "*.sudoku"))
+                       + glob.glob(os.path.join(directory, "*", "*.sudoku")))
+    model = CostModel.load(modelFile)
+    fileMakespan, costMakespan, records = compare_makespan(fileNames, workers, model, timeLimit)
+    model.save(modelFile)
+    for record in records:
+        print "%-45s predicted %9.3g s, actual %9.3g s, %s" % (record['file'], record['predicted'], record['actual'],
+                                                                record['result'])
+    error = model.error()
+    print "makespan: file order %.3g s, cost order %.3g s (%.2fx); median prediction error %s" % (
+        fileMakespan, costMakespan, fileMakespan/costMakespan, "%.2fx" % error if error is not None else "unknown")
+    for simulated in [2, 4, 8, 16]:
+        fileOrder, costOrder = compare_simulated(records, simulated)
+        print "%2d workers (simulated from the actual times): file order %.3g s, cost order %.3g s (%.2fx)" % (
+            simulated, fileOrder, costOrder, fileOrder/costOrder)
+        fileOrder, costOrder = compare_cross_validated(records, simulated, timeLimit)
+        print "%2d workers (simulated, leave-one-out predictions): file order %.3g s, cost order %.3g s (%.2fx)" % (
+            simulated, fileOrder, costOrder, fileOrder/costOrder)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# A corpus file of parsed puzzles, built once and memory-mapped read-only by every worker process, so workers
+# share one copy of it in the page cache instead of each parsing the puzzles again. Only the puzzles are shared:
+# SudokuBoard finds a tile's row, column and box by arithmetic, and the kernels have their peer and unit tables
+# compiled into the code SudokuKernel caches on disk, so there are no size tables left for workers to build.
+
+import math, mmap, os, struct, subprocess, sys, time, types
+import cPickle as pickle
+import numpy as np
+import SudokuStarter
+
+MAGIC = 'SDKS'
+VERSION = 2
+# magic, version, number of puzzles
+HEADER = struct.Struct('<4sBxxxI')
+# board size, file offset of the puzzle's data
+ENTRY = struct.Struct('<HxxxxxxQ')
+
+
+def _align(f):
+    # every array starts on an 8 byte boundary so it can be viewed in place
+    f.write('\0'*(-f.tell() % 8))
+    return f.tell()
+
+
+def _write_board(f, board):
+    N = board.BoardSize
+    offset = _align(f)
+    f.write(bytearray(board.CurrentGameBoard[row][col] for row in range(N) for col in range(N)))
+    _align(f)
+    f.write(np.array(board.BoardConstraintsNum, dtype='<i2').tostring())
+    _align(f)
+    lengths = [len(board.PossibleNum[row][col]) for row in range(N) for col in range(N)]
+    f.write(np.cumsum([0]+lengths).astype('<u4').tostring())
+    f.write(bytearray(value for row in range(N) for col in range(N) for value in board.PossibleNum[row][col]))
+    return offset
+
+
+def build_corpus(fileNames, filename):
+    """Parses every puzzle file (with parse_file, so including its propagation) and writes the boards to the
+    corpus file filename. Returns the number of puzzles. The file is written under a temporary name and renamed,
+    so workers never map a half-written corpus."""
+    boards = [SudokuStarter.parse_file(fileName) for fileName in fileNames]
+    temporary = "%s.%d.tmp" % (filename, os.getpid())
+    f = open(temporary, 'wb')
+    f.write(HEADER.pack(MAGIC, VERSION, len(boards)))
+    f.write('\0'*(ENTRY.size*len(boards)))
+    entries = [(board.BoardSize, _write_board(f, board)) for board in boards]
+    f.seek(HEADER.size)
+    for size, offset in entries:
+        f.write(ENTRY.pack(size, offset))
+    f.close()
+    os.rename(temporary, filename)
+    return len(boards)
+
+
+class SharedCorpus(object):
+    """A corpus file mapped read-only. The grids it gives out are numpy views of the mapping, so they cost no
+    memory of their own; every process that maps the file shares the same pages."""
+
+    def __init__(self, filename):
+        self.file = open(filename, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a version %d sudoku corpus" % (filename, VERSION))
+        self.puzzles = [ENTRY.unpack_from(self.map, HEADER.size+i*ENTRY.size) for i in range(count)]
+
+    def __len__(self):
+        return len(self.puzzles)
+
+    def _arrays(self, index):
+        N, offset = self.puzzles[index]
+        values = np.frombuffer(self.map, np.uint8, N*N, offset).reshape(N, N)
+        offset += -(-N*N//8)*8
+        constraints = np.frombuffer(self.map, '<i2', N*N, offset).reshape(N, N)
+        offset += -(-2*N*N//8)*8
+        ends = np.frombuffer(self.map, '<u4', N*N+1, offset)
+        return N, values, constraints, ends, offset+4*(N*N+1)
+
+    def grid(self, index):
+        """The tile values of puzzle index (after propagation) as a read-only N x N view."""
+        return self._arrays(index)[1]
+
+    def board(self, index):
+        """A SudokuBoard of puzzle index in the state parse_file left it, built from the mapped arrays without
+        parsing or propagating anything. The board has lists of its own, since the search changes them."""
+        N, values, constraints, ends, start = self._arrays(index)
+        # an instance without running the constructor, whose constraint counts and possible values would all be
+        # replaced anyway
+        board = types.InstanceType(SudokuStarter.SudokuBoard)
+        board.BoardSize = N
+        board.squareSize = int(math.sqrt(N))
+        board.CurrentGameBoard = values.tolist()
+        board.BoardConstraintsNum = constraints.tolist()
+        ends = ends.tolist()
+        possible = bytearray(self.map[start:start+ends[-1]])
+        board.PossibleNum = [[list(possible[ends[row*N+col]:ends[row*N+col+1]]) for col in range(N)]
+                             for row in range(N)]
+        board.countPossibleNum()
+        return board
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+_opened = {}
+
+
+def open_corpus(filename):
+    """The SharedCorpus of filename, mapped once per process and reused."""
+    if filename not in _opened:
+        _opened[filename] = SharedCorpus(filename)
+    return _opened[filename]
+
+
+def _load_worker():
+    # runs in a new interpreter, like a newly started worker (a forked one would start from its parent's peak
+    # memory): reads (fileNames, filename) from stdin and loads every board, by parsing fileNames or (if filename
+    # isn't None) from the corpus file, keeping them all like a worker holding its share of a batch
+    fileNames, filename = pickle.load(sys.stdin)
+    try:
+        import resource
+    except ImportError:
+        # no resource module (Windows): the memory is left out
+        resource = None
+    startMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else None
+    start = time.time()
+    if filename is None:
+        boards = [SudokuStarter.parse_file(fileName) for fileName in fileNames]
+    else:
+        corpus = open_corpus(filename)
+        boards = [corpus.board(index) for index in range(len(corpus))]
+    seconds = time.time()-start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss-startMemory if resource is not None else None
+    pickle.dump((seconds, peak), sys.stdout)
+
+
+def compare_loading(fileNames, filename):
+    """Loads every board in a fresh process, once with parse_file and once from the corpus file filename (which
+    must have been built from fileNames). Returns ((seconds, peak memory growth in KB) parsing, (seconds, KB) from
+    the corpus): what each worker saves at startup. The KB are None where the resource module is missing."""
+    command = "import sys; sys.path.insert(0, %r); import SudokuShared; SudokuShared._load_worker()" % (
+        os.path.dirname(os.path.abspath(__file__)))
+    results = []
+    for corpusFile in [None, filename]:
+        process = subprocess.Popen([sys.executable, '-c', command], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        output = process.communicate(pickle.dumps((fileNames, corpusFile)))[0]
+        if process.returncode != 0:
+            raise RuntimeError("loading the boards failed with exit status %d" % process.returncode)
+        results.append(pickle.loads(output))
+    return tuple(results)
+
+
+if __name__ == '__main__':
+    # usage: SudokuShared.py corpus_file puzzle_file...   builds the corpus and compares loading from it
+    import glob
+    filename = sys.argv[1] if len(sys.argv) > 1 else "corpus.sdks"
+    fileNames = sys.argv[2:] or sorted(glob.glob("input_puzzles/more/*/*.sudoku"))
+    start = time.time()
+    build_corpus(fileNames, filename)
+    print "built %s (%d bytes) in %.3g s" % (filename, os.path.getsize(filename), time.time()-start)
+    (parseTime, parseMemory), (mappedTime, mappedMemory) = compare_loading(fileNames, filename)
+    print "%d boards per worker: parse_file %.3g s, from the corpus %.3g s (%.1fx)" % (len(fileNames), parseTime,
+                                                                                       mappedTime, parseTime/mappedTime)
+    if parseMemory is not None:
+        # ru_maxrss counts the mapped corpus pages too, although every worker shares them
+        print "peak memory growth per worker: parse_file %d KB, from the corpus %d KB" % (parseMemory, mappedMemory)
@@ -4,7 +4,28 @@
 # Team members: Jerry Li (jlt709) Alan Fu (yfo776)
 
 import struct, string, math, copy, time
+try:
+    import resource
+except ImportError:
+    resource = None
 consistencyChecks=0
+# bytes of search state (boards waiting on the stack) held at the deepest point of the last search
+peakSearchBytes=0
+
+
+class MemoryLimitExceeded(MemoryError):
+    """Raised by a search whose boards would take more than its memoryLimit bytes. Carries the limit, the bytes
+    the search needed, its depth then, the bytes of one board and its progress stats (see SearchProgress)."""
+
+    def __init__(self, limit, needed, depth, nodeBytes, stats):
+        MemoryError.__init__(self, "the search needs %d bytes at depth %d (%d bytes per board), over the limit "
+                                   "of %d bytes" % (needed, depth, nodeBytes, limit))
+        self.limit = limit
+        self.needed = needed
+        self.depth = depth
+        self.nodeBytes = nodeBytes
+        self.stats = stats
+
 class SudokuBoard:
     """This will be the sudoku board game object your player will manipulate."""
 
@@ -18,6 +39,56 @@ class SudokuBoard:
         self.BoardConstraintsNum=[ [ ((self.BoardSize-1)*2+(self.squareSize-1)**2) for i in range(self.BoardSize) ] for j in range(self.BoardSize) ]
         # The list of possible numbers that can go into this tile
         self.PossibleNum=[ [ [ (i+1) for i in range(self.BoardSize) ] for j in range(self.BoardSize) ] for k in range(self.BoardSize) ]
+        # For every row/column/box, how many of its tiles still have each value in their PossibleNum ([unit][value]),
+        # and PossibleCount, the number of possible values on the whole board. Kept up to date by removePossibleNum
+        # so that orderDomainValues (and the trace) don't have to scan the board.
+        self.countPossibleNum()
+
+    def __deepcopy__(self, memo):
+        """Copies the board list by list. This is what copy.deepcopy would do, just without its generic bookkeeping
+        for every list and int, which made copying the board the most expensive part of backTrack."""
+        boardCopy = copy.copy(self)
+        boardCopy.CurrentGameBoard = [row[:] for row in self.CurrentGameBoard]
+        boardCopy.BoardConstraintsNum = [row[:] for row in self.BoardConstraintsNum]
+        boardCopy.PossibleNum = [[tile[:] for tile in row] for row in self.PossibleNum]
+        boardCopy.RowValueCount = [counts[:] for counts in self.RowValueCount]
+        boardCopy.ColValueCount = [counts[:] for counts in self.ColValueCount]
+        boardCopy.BoxValueCount = [counts[:] for counts in self.BoxValueCount]
+        return boardCopy
+
+    def countPossibleNum(self):
+        """Recounts RowValueCount, ColValueCount, BoxValueCount and PossibleCount from PossibleNum. Only needed
+        when PossibleNum was changed without going through removePossibleNum."""
+        self.PossibleCount=0
+        self.RowValueCount=[ [0]*(self.BoardSize+1) for i in range(self.BoardSize) ]
+        self.ColValueCount=[ [0]*(self.BoardSize+1) for i in range(self.BoardSize) ]
+        self.BoxValueCount=[ [0]*(self.BoardSize+1) for i in range(self.BoardSize) ]
+        for row in range(self.BoardSize):
+            for col in range(self.BoardSize):
+                box=(row/self.squareSize)*self.squareSize+col/self.squareSize
+                for value in self.PossibleNum[row][col]:
+                    self.RowValueCount[row][value]+=1
+                    self.ColValueCount[col][value]+=1
+                    self.BoxValueCount[box][value]+=1
+                self.PossibleCount+=len(self.PossibleNum[row][col])
+
+    def removePossibleNum(self, row, col, value):
+        """Removes value from the PossibleNum of a tile (if it's there) and updates the value counts."""
+        if value in self.PossibleNum[row][col]:
+            self.PossibleNum[row][col].remove(value)
+            self.PossibleCount-=1
+            self.RowValueCount[row][value]-=1
+            self.ColValueCount[col][value]-=1
+            self.BoxValueCount[(row/self.squareSize)*self.squareSize+col/self.squareSize][value]-=1
+
+    def clearPossibleNum(self, row, col):
+        """Empties the PossibleNum of a tile and updates the value counts."""
+        for value in self.PossibleNum[row][col]:
+            self.RowValueCount[row][value]-=1
+            self.ColValueCount[col][value]-=1
+            self.BoxValueCount[(row/self.squareSize)*self.squareSize+col/self.squareSize][value]-=1
+        self.PossibleCount-=len(self.PossibleNum[row][col])
+        self.PossibleNum[row][col]=[]
 
     def set_value(self, row, col, value):
         global consistencyChecks
@@ -35,8 +106,7 @@ class SudokuBoard:
         # Change the possible numbers of the tiles that are in the same row/column/square as the tile.
         # Also change the BoardConstraintsNum of all tiles affected by the newly added tile
         for i in range(0,self.BoardSize):
-            if value in self.PossibleNum[i][col]:
-                self.PossibleNum[i][col].remove(value)
+            self.removePossibleNum(i,col,value)
             #if one of the tile in the same column no longer have any possible values.
             # Note: I did not choose to reverse the changes here. I think I could create a copy of the sudoku every time I call set_value to avoid reversing changes.
             if self.PossibleNum[i][col]==[] and self.CurrentGameBoard[i][col]==0:
@@ -44,8 +114,7 @@ class SudokuBoard:
                 return False
             # Change BoardConstraintsNum
             self.BoardConstraintsNum[i][col]-=1
-            if value in self.PossibleNum[row][i]:
-                self.PossibleNum[row][i].remove(value)
+            self.removePossibleNum(row,i,value)
             if self.PossibleNum[row][i]==[] and self.CurrentGameBoard[row][i]==0:
                 # print "can't set "+str(value)+" in "+str([row,col])+" because "+str([row,i])+"has no other option then"
                 return False
@@ -55,8 +124,7 @@ class SudokuBoard:
         blockTopLeftCorner=((row/self.squareSize)*self.squareSize,(col/self.squareSize)*self.squareSize)
         for i in range(blockTopLeftCorner[0],blockTopLeftCorner[0]+self.squareSize):
             for j in range(blockTopLeftCorner[1],blockTopLeftCorner[1]+self.squareSize):
-                if value in self.PossibleNum[i][j]:
-                    self.PossibleNum[i][j].remove(value)
+                self.removePossibleNum(i,j,value)
                 if self.PossibleNum[i][j]==[] and self.CurrentGameBoard[i][j]==0:
                     return False
                 # Change BoardConstraintsNum if it has not been changed yet.
@@ -64,7 +132,7 @@ class SudokuBoard:
                 if i!=row and j!=col:
                     self.BoardConstraintsNum[i][j]-=1
         #remove all possible values from the tile that we are setting value for
-        self.PossibleNum[row][col]=[]
+        self.clearPossibleNum(row,col)
 
         #Now we will check whether a tile has only one possible value. If so, set that value and return false if we can't set that value
         for i in range(0,self.BoardSize):
@@ -94,45 +162,16 @@ class SudokuBoard:
         self.CurrentGameBoard[row][col]=value
         # Change the constraint number for this tile to -1 to indicate that this tile has already been filled
         self.BoardConstraintsNum[row][col]=-1
-        self.PossibleNum[row][col]=[]
+        self.clearPossibleNum(row,col)
         #return true if the sudoku is still solvable after we added all the values.
         return True
 
 
     def print_board(self):
         """Prints the current game board. Leaves unassigned spots blank."""
-        div = int(math.sqrt(self.BoardSize))
-        dash = ""
-        space = ""
-        line = "+"
-        sep = "|"
-        for i in range(div):
-            dash += "----"
-            space += "    "
-        for i in range(div):
-            line += dash + "+"
-            sep += space + "|"
-        for i in range(-1, self.BoardSize):
-            if i != -1:
-                print "|",
-                for j in range(self.BoardSize):
-                    if self.CurrentGameBoard[i][j] > 9:
-                        print self.CurrentGameBoard[i][j],
-                    elif self.CurrentGameBoard[i][j] > 0:
-                        print "", self.CurrentGameBoard[i][j],
-                    else:
-                        print "  ",
-                    if (j+1 != self.BoardSize):
-                        if ((j+1)//div != j/div):
-                            print "|",
-                        else:
-                            print "",
-                    else:
-                        print "|"
-            if ((i+1)//div != i/div):
-                print line
-            else:
-                print sep
+        # the whole board is rendered into one string first (see SudokuRender), instead of a print per tile
+        import SudokuRender
+        print SudokuRender.render_pretty(self)[:-1]
 
 
 def parse_file(filename):
@@ -198,72 +237,287 @@ def init_board(file_name):
     return parse_file(file_name)
 
 
-def solve(initial_board, forward_checking=True, MRV=True, MCV=False, LCV=True):
+def filled_board(rows):
+    """A SudokuBoard holding the tile values of rows (a filled grid), with no possible values or constraints
+    left, like the solved boards backTrack returns."""
+    size = len(rows)
+    board = SudokuBoard(size, [list(row) for row in rows])
+    board.BoardConstraintsNum = [[-1]*size for i in range(size)]
+    board.PossibleNum = [[[] for j in range(size)] for i in range(size)]
+    board.countPossibleNum()
+    return board
+
+
+def solve(initial_board, forward_checking=True, MRV=True, MCV=False, LCV=True, profile=False, trace=None,
+          checkpoint=None, checkpointInterval=60, backjumping=False, probing=0, kernels=True, localSearch=None,
+          memoryLimit=None):
     """Takes an initial SudokuBoard and solves it using back tracking, and zero
     or more of the heuristics and constraint propagation methods (determined by
-    arguments). Returns the resulting board solution. """
+    arguments). Returns the resulting board solution.
+    profile=True prints the time spent in each phase of the search afterwards; pass a SudokuProfile.Profiler
+    instead to keep the numbers (and write them out as collapsed stacks or cProfile data). Profiling turns the
+    kernels off, since they don't go through the phases it times.
+    The other options are the ones of solve_events, which does the search; solve stops it at the first solution
+    and prints what happened. If the local search runs out of time, the best board it found is returned instead,
+    with its number of conflicts as its Conflicts attribute (is_complete tells it apart from a solution)."""
     global consistencyChecks
+    if profile:
+        import SudokuProfile
+        profiler = SudokuProfile.as_profiler(profile)
+        with profiler.profiling('solve', [initial_board.__class__]):
+            result = solve(initial_board, forward_checking, MRV, MCV, LCV, trace=trace, checkpoint=checkpoint,
+                           checkpointInterval=checkpointInterval, backjumping=backjumping, probing=probing,
+                           kernels=False, localSearch=localSearch, memoryLimit=memoryLimit)
+        if profile is True:
+            profiler.report()
+        return result
     start=time.time()
     # MRV and MCV cannot be used simultaneously
     if MRV == True and MCV == True:
         print "Error! MRV and MCV cannot be used simultaneously. Setting MCV to False!"
         MCV=False
 
-    result = backTrack(initial_board, forward_checking, MRV, MCV, LCV)
-    if result==False:
+    result = False
+    events = solve_events(initial_board, forward_checking, MRV, MCV, LCV, trace=trace, checkpoint=checkpoint,
+                          checkpointInterval=checkpointInterval, backjumping=backjumping, probing=probing,
+                          kernels=kernels, localSearch=localSearch, memoryLimit=memoryLimit, progressInterval=None)
+    for kind, payload in events:
+        if kind == 'probe':
+            print "Probing eliminated "+str(payload['eliminated'])+" candidate(s) in "+str(payload['seconds'])+" second(s)"
+        elif kind == 'best':
+            result = payload['board']
+            result.Conflicts = payload['conflicts']
+        elif kind == 'solution':
+            result = payload
+            break
+    # stops the search (and closes the trace file)
+    events.close()
+    if result!=False and hasattr(result, 'Conflicts'):
+        print "Local search stopped with "+str(result.Conflicts)+" conflict(s) left after "+str(time.time()-start)+" second(s)"
+    elif result==False:
         print "Error! Board cannot be solved"
     else:
         end=time.time()
         print "Sudoku solved. Time elapsed: "+str(end-start)+" second(s)"
         print "Number of consistency checks done: " +str(consistencyChecks)
+        if memoryLimit is not None:
+            # an estimate: the deepest the search got times the size of the board it started from
+            print "Estimated peak search memory: "+str((peakSearchBytes+1023)/1024)+" KB"
     return result
 
 
-def backTrack(initial_board, forward_checking, MRV, MCV, LCV):
+def solve_events(initial_board, forward_checking=True, MRV=True, MCV=False, LCV=True, trace=None, checkpoint=None,
+                 checkpointInterval=60, backjumping=False, probing=0, kernels=True, localSearch=None,
+                 memoryLimit=None, progressInterval=1.0):
+    """Searches initial_board like solve, without printing anything, and yields (kind, payload) events as they
+    happen, so the caller decides when to stop:
+    ('probe', {eliminated, seconds}) once probing is done,
+    ('solution', board) for every solution, in the order backTrack would find them,
+    ('progress', {nodes, depth, elapsed, consistencyChecks, nodeBytes, peakBytes, maxrssKB}) every
+    progressInterval seconds (None for never),
+    ('best', {board, conflicts}) when the local search runs out of time (see below),
+    ('done', the progress stats plus solutions) once the whole search space has been searched.
+    trace is the name of a file to stream a binary trace of every decision of the search to (see SudokuTrace).
+    checkpoint is the name of a file to save the search to every checkpointInterval seconds and when the process
+    is signalled; if the file exists, the search resumes from it (see SudokuCheckpoint).
+    backjumping=True uses conflict-directed backjumping (backJump) instead of chronological backtracking.
+    probing=True removes every candidate that wipes out a domain on its own before the search starts (see
+    probeCandidates); a number k > 1 also probes the nodes of the search less than k decisions deep.
+    kernels=True runs the plain search (no trace, checkpoint, backjumping or probing below the root) of a
+    SudokuBoard with the search kernel generated for its size (see SudokuKernel), which visits the same nodes.
+    localSearch=seconds replaces the search with simulated annealing from the propagated (and probed) domains
+    for at most that long (see SudokuLocalSearch): it yields a solution if it finds one and otherwise the best
+    filling it found with its number of conflicts. It can't prove a board unsolvable, and the heuristics and
+    the other search options don't apply to it.
+    memoryLimit=bytes caps the memory of the boards a search keeps on its stack (one per decision, counted as
+    the size of the starting board): if the deepest possible search wouldn't fit, a SudokuBoard is searched as a
+    CompactSudokuBoard (without the kernels) instead, and if the search gets deeper than the limit allows
+    anyway it raises MemoryLimitExceeded. peakSearchBytes (and the progress stats) estimate how much it needed;
+    the board sizes are only measured when there is a memoryLimit or a progressInterval (otherwise they are 0).
+    The checkpointed and backjumping searches only find the first solution and give no progress events; they
+    and the local search don't count their memory."""
+    if MRV == True and MCV == True:
+        MCV=False
+    if backjumping and (trace is not None or checkpoint is not None):
+        raise ValueError("backjumping can't be combined with trace or checkpoint")
+    if checkpoint is not None and trace is not None:
+        raise ValueError("a search can't be traced and checkpointed at the same time")
+    if probing > 1 and (trace is not None or checkpoint is not None or backjumping):
+        raise ValueError("probing below the root only works without trace, checkpoint and backjumping")
+    if localSearch and (trace is not None or checkpoint is not None or backjumping or probing > 1):
+        raise ValueError("local search can't be combined with trace, checkpoint, backjumping or probing below the root")
+    if memoryLimit is not None and (checkpoint is not None or backjumping or localSearch):
+        raise ValueError("memoryLimit only works for the plain, traced and probing searches")
+    global peakSearchBytes
+    peakSearchBytes = 0
+    measure = memoryLimit is not None or progressInterval is not None
+    progress = SearchProgress(progressInterval, memoryLimit=memoryLimit)
+    solutions = 0
+
+    if probing:
+        initial_board = copy.deepcopy(initial_board)
+        result, eliminated, seconds = probeCandidates(initial_board)
+        yield 'probe', dict(eliminated=eliminated, seconds=seconds)
+        if result==False:
+            stats = progress.stats(0)
+            stats['solutions'] = 0
+            yield 'done', stats
+            return
+
+    if localSearch:
+        import SudokuLocalSearch
+        for kind, payload in SudokuLocalSearch.search_events(initial_board, localSearch, progress=progress):
+            yield kind, payload
+            if kind != 'progress':
+                # it doesn't cover the search space, so there is no 'done' unless propagation ruled out every board
+                return
+    elif backjumping or checkpoint is not None:
+        if backjumping:
+            result = backJump(initial_board, forward_checking, MRV, MCV, LCV)[0]
+        else:
+            import SudokuCheckpoint
+            result = SudokuCheckpoint.resumable_backtrack(initial_board, forward_checking, MRV, MCV, LCV, checkpoint,
+                                                          checkpointInterval)
+        if result != False:
+            solutions += 1
+            yield 'solution', result
+    elif (kernels and trace is None and probing <= 1 and initial_board.__class__ is SudokuBoard
+          and not hasattr(initial_board, 'ValueHints')
+          and (memoryLimit is None or deepestStackBytes(initial_board, True) <= memoryLimit)):
+        import SudokuKernel
+        if measure:
+            from SudokuCompact import deep_sizeof
+            progress.nodeBytes = deep_sizeof(SudokuKernel.board_to_state(initial_board))
+        for kind, payload in SudokuKernel.search_events(initial_board, forward_checking, MRV, MCV, LCV, progress):
+            if kind == 'solution':
+                solutions += 1
+            yield kind, payload
+    else:
+        import SudokuCompact
+        if measure:
+            progress.nodeBytes = SudokuCompact.deep_sizeof(initial_board)
+        if (memoryLimit is not None and initial_board.__class__ is SudokuBoard
+                and deepestStackBytes(initial_board) > memoryLimit):
+            initial_board = SudokuCompact.CompactSudokuBoard.from_board(initial_board)
+            progress.nodeBytes = SudokuCompact.deep_sizeof(initial_board)
+        writer = None
+        if trace is not None:
+            import SudokuTrace
+            writer = SudokuTrace.TraceWriter(trace, initial_board, forward_checking)
+        try:
+            for kind, payload in searchNode(initial_board, forward_checking, MRV, MCV, LCV, writer, 0, probing,
+                                            progress):
+                if kind == 'solution':
+                    solutions += 1
+                yield kind, payload
+        finally:
+            if writer is not None:
+                writer.close()
+    stats = progress.stats(0)
+    stats['solutions'] = solutions
+    yield 'done', stats
+
+
+def iter_solutions(initial_board, forward_checking=True, MRV=True, MCV=False, LCV=True, **options):
+    """Yields the solutions of initial_board one at a time as the search finds them. Takes the options of
+    solve_events (a progressInterval is ignored, since only the solutions come out); stop iterating to stop the
+    search."""
+    options.pop('progressInterval', None)
+    for kind, payload in solve_events(initial_board, forward_checking, MRV, MCV, LCV, progressInterval=None,
+                                      **options):
+        if kind == 'solution':
+            yield payload
+
+
+def deepestStackBytes(board, kernel=False):
+    """The bytes the boards on the stack of the deepest possible search of board take: one per empty tile and
+    the root, each the size of board (or of its SudokuKernel state if kernel is true)."""
+    from SudokuCompact import deep_sizeof
+    if kernel:
+        import SudokuKernel
+        node = SudokuKernel.board_to_state(board)
+    else:
+        node = board
+    empty = sum(list(row).count(0) for row in board.CurrentGameBoard)
+    return (empty+1)*deep_sizeof(node)
+
+
+class SearchProgress:
+    """Counts the nodes a search visits and tells it when the next progress event is due. Also keeps track of
+    the deepest node, which (times nodeBytes, the bytes of one board of the search) is the most memory the
+    boards on the search stack took, and raises MemoryLimitExceeded if that goes over memoryLimit."""
+
+    def __init__(self, interval, nodeBytes=0, memoryLimit=None):
+        self.start = time.time()
+        self.nodes = 0
+        self.interval = interval
+        self.nextReport = self.start+interval if interval is not None else float('inf')
+        self.nodeBytes = nodeBytes
+        self.memoryLimit = memoryLimit
+        self.maxDepth = -1
+
+    def deeper(self, depth):
+        """Called when the search reaches a node deeper than maxDepth."""
+        global peakSearchBytes
+        self.maxDepth = depth
+        needed = (depth+1)*self.nodeBytes
+        peakSearchBytes = max(peakSearchBytes, needed)
+        if self.memoryLimit is not None and needed > self.memoryLimit:
+            raise MemoryLimitExceeded(self.memoryLimit, needed, depth, self.nodeBytes, self.stats(depth))
+
+    def stats(self, depth):
+        now = time.time()
+        if self.interval is not None:
+            self.nextReport = now+self.interval
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else None
+        return dict(nodes=self.nodes, depth=depth, elapsed=now-self.start, consistencyChecks=consistencyChecks,
+                    nodeBytes=self.nodeBytes, peakBytes=(self.maxDepth+1)*self.nodeBytes, maxrssKB=maxrss)
+
+
+# Returns the first solution searchNode finds (the same board the recursive search always returned), or False.
+def backTrack(initial_board, forward_checking, MRV, MCV, LCV, trace=None, depth=0, probeDepth=0):
+    for kind, board in searchNode(initial_board, forward_checking, MRV, MCV, LCV, trace, depth, probeDepth):
+        if kind == 'solution':
+            return board
+    return False
+
+
+# The search itself, as a generator: yields ('solution', board) for every solution below initial_board in the
+# order backTrack finds them, and ('progress', stats) from progress (an optional SearchProgress) when it is due.
+# trace is an optional SudokuTrace.TraceWriter that gets every decision and failure; depth is the number of
+# decisions made above initial_board. Nodes less than probeDepth decisions deep (except the root, which solve
+# probes itself) are shrunk with probeCandidates before branching.
+def searchNode(initial_board, forward_checking, MRV, MCV, LCV, trace=None, depth=0, probeDepth=0, progress=None):
     global consistencyChecks
     # print "one call"
+    if progress is not None:
+        progress.nodes += 1
+        if depth > progress.maxDepth:
+            progress.deeper(depth)
+        if time.time() >= progress.nextReport:
+            yield 'progress', progress.stats(depth)
     if is_complete(initial_board):
-        return initial_board
+        if trace is not None:
+            trace.solution(depth)
+        yield 'solution', initial_board
+        return
     size = initial_board.BoardSize  # length of the board
 
-    if forward_checking == True:
-        nextRow = -1    # nextRow and nextCol hold the index of the next tile to be assigned
-        nextCol = -1
-
-        # if neither MRV nor MCV is used, use the first empty tile as next assignment
-        if not (MRV or MCV):
-            for row in range(size):
-                for col in range(size):
-                    if initial_board.CurrentGameBoard[row][col] == 0:
-                        if not initial_board.PossibleNum[row][col]:
-                            return False
-                        else:
-                            nextRow, nextCol = row, col
-                            break
-                if nextRow!=-1:
-                    break
+    if 0 < depth < probeDepth:
+        if probeCandidates(initial_board)[0] == False:
+            return
+        if is_complete(initial_board):
+            yield 'solution', initial_board
+            return
 
-        # else if MRV is used, use the tile that has minimum remaining value as the next assignment
-        elif MRV:
-            currentMin = size+1   # the number of least remaining values seen so far
-            for row in range(size):
-                for col in range(size):
-                    if initial_board.CurrentGameBoard[row][col] == 0 and len(initial_board.PossibleNum[row][col]) < currentMin:
-                        if not initial_board.PossibleNum[row][col]:
-                            return False
-                        else:
-                            nextRow, nextCol = row, col
-
-        # else if MCV is used, use the tile that is is involved in the largest number of constraints with other unassigned variables as the next assignment
-        elif MCV:
-            currentMax = -1   # the number of most constraints seen so far
-            for row in range(size):
-                for col in range(size):
-                    if initial_board.CurrentGameBoard[row][col] == 0 and initial_board.BoardConstraintsNum[row][col] > currentMax:
-                        if not initial_board.PossibleNum[row][col]:
-                            return False
-                        else:
-                            nextRow, nextCol = row, col
+    if forward_checking == True:
+        # nextRow and nextCol hold the index of the next tile to be assigned
+        nextTile = selectUnassignedVariable(initial_board, MRV, MCV)
+        if nextTile == False:
+            if trace is not None:
+                trace.failure(depth)
+            return
+        nextRow, nextCol = nextTile
 
         valueToAssignList = []
 
@@ -276,16 +530,20 @@ def backTrack(initial_board, forward_checking, MRV, MCV, LCV):
 
         # print "nextRow, nextCol, val: " + str(nextRow)+" "+str(nextCol)+" "+str(valueToAssignList)
 
+        if trace is not None:
+            domainSize = len(initial_board.PossibleNum[nextRow][nextCol])
         for val in valueToAssignList:
             boardCopy = copy.deepcopy(initial_board)
-            boardCopy.set_value(nextRow, nextCol, val)
+            assigned = boardCopy.set_value(nextRow, nextCol, val)
+            if trace is not None:
+                trace.decision(depth, nextRow, nextCol, val, assigned, domainSize, boardCopy)
             # print "nextRow, nextCol, val: " + str(nextRow)+" "+str(nextCol)+" "+str(val)
-            result = backTrack(boardCopy, forward_checking, MRV, MCV, LCV)
-            if result != False:
-                return result
+            for event in searchNode(boardCopy, forward_checking, MRV, MCV, LCV, trace, depth+1, probeDepth, progress):
+                yield event
             # else:
             #     initial_board.PossibleNum[nextRow][nextCol].remove(val)
-        return False
+        if trace is not None:
+            trace.failure(depth)
     # If there is no forward checking
     else:
         nextRow = -1    # nextRow and nextCol hold the index of the next tile to be assigned
@@ -301,6 +559,8 @@ def backTrack(initial_board, forward_checking, MRV, MCV, LCV):
                 break
 
         valueToAssignList =  initial_board.PossibleNum[nextRow][nextCol]
+        if trace is not None:
+            domainSize = len(valueToAssignList)
 
         # print "nextRow, nextCol, val: " + str(nextRow)+" "+str(nextCol)+" "+str(valueToAssignList)
 
@@ -326,16 +586,269 @@ def backTrack(initial_board, forward_checking, MRV, MCV, LCV):
                             break
                     if result==False:
                         break
+            if result==False and trace is not None:
+                trace.decision(depth, nextRow, nextCol, val, False, domainSize, initial_board)
             if result!=False:
                 boardCopy = copy.deepcopy(initial_board)
                 boardCopy.set_value_no_forward_checking(nextRow, nextCol, val)
+                if trace is not None:
+                    trace.decision(depth, nextRow, nextCol, val, True, domainSize, boardCopy)
                 # print "nextRow, nextCol, val: " + str(nextRow)+" "+str(nextCol)+" "+str(val)
-                result = backTrack(boardCopy, forward_checking, MRV, MCV, LCV)
-                if result != False:
-                    return result
+                for event in searchNode(boardCopy, forward_checking, MRV, MCV, LCV, trace, depth+1, probeDepth,
+                                        progress):
+                    yield event
                 # else:
                 #     initial_board.PossibleNum[nextRow][nextCol].remove(val)
-        return False
+        if trace is not None:
+            trace.failure(depth)
+
+
+# Failed-literal probing (singleton arc consistency): tries every candidate of every empty tile on a copy of the
+# board with set_value and removes it from the board for good if it wipes out a domain. A tile left with one
+# candidate is set right away. Repeats until a whole pass removes nothing, since every removal can make other
+# candidates fail. CHANGES board; returns [False if the board turned out to be unsolvable, number of candidates
+# removed, seconds taken]. The set_value calls of the trials count as consistency checks.
+def probeCandidates(board):
+    start = time.time()
+    size = board.BoardSize
+    eliminated = 0
+    changed = True
+    while changed:
+        changed = False
+        for row in range(size):
+            for col in range(size):
+                if board.CurrentGameBoard[row][col] != 0:
+                    continue
+                for value in list(board.PossibleNum[row][col]):
+                    if board.CurrentGameBoard[row][col] != 0:
+                        break
+                    boardCopy = copy.deepcopy(board)
+                    if boardCopy.set_value(row, col, value):
+                        continue
+                    board.removePossibleNum(row, col, value)
+                    eliminated += 1
+                    changed = True
+                    if not board.PossibleNum[row][col]:
+                        return [False, eliminated, time.time()-start]
+                    if len(board.PossibleNum[row][col]) == 1:
+                        if not board.set_value(row, col, board.PossibleNum[row][col][0]):
+                            return [False, eliminated, time.time()-start]
+    return [True, eliminated, time.time()-start]
+
+
+# Conflict-directed backjumping version of backTrack. reasons[row*size+col] is a bit mask of the decision levels
+# that filled that tile (0 for the clues): the decision itself for the tile it assigned, and for the tiles
+# set_value filled by propagation also the levels of everything that forced them. Returns (solution or False,
+# conflict mask): on failure, the levels whose assignments caused it. A node whose own level isn't in the
+# conflict of a failed child can't be helped by its other values, so it returns right away and the search
+# jumps back to the deepest level that is.
+def backJump(initial_board, forward_checking, MRV, MCV, LCV, reasons=None, depth=0):
+    global consistencyChecks
+    size = initial_board.BoardSize
+    if reasons is None:
+        reasons = [0]*(size*size)
+    if is_complete(initial_board):
+        return initial_board, 0
+    level = 1 << depth
+
+    if forward_checking == True:
+        nextTile = selectUnassignedVariable(initial_board, MRV, MCV)
+        if nextTile == False:
+            return False, wipeoutReason(initial_board, reasons, depth)
+        nextRow, nextCol = nextTile
+        if LCV:
+            valueToAssignList = orderDomainValues(initial_board, [nextRow, nextCol])
+        else:
+            valueToAssignList = initial_board.PossibleNum[nextRow][nextCol]
+        # the values missing from the domain were removed by the tiles around it
+        conflict = removalReason(initial_board, reasons, nextRow, nextCol, initial_board.PossibleNum[nextRow][nextCol])
+        for val in valueToAssignList:
+            boardCopy = copy.deepcopy(initial_board)
+            assigned = boardCopy.set_value(nextRow, nextCol, val)
+            childReasons = explainPropagation(initial_board, boardCopy, reasons, nextRow, nextCol, level)
+            if assigned:
+                result, childConflict = backJump(boardCopy, forward_checking, MRV, MCV, LCV, childReasons, depth+1)
+                if result != False:
+                    return result, 0
+            else:
+                childConflict = wipeoutReason(boardCopy, childReasons, depth+1)
+            if not childConflict & level:
+                return False, childConflict
+            conflict |= childConflict & ~level
+        return False, conflict
+    # If there is no forward checking
+    else:
+        nextRow = -1
+        nextCol = -1
+        for row in range(size):
+            for col in range(size):
+                if initial_board.CurrentGameBoard[row][col] == 0:
+                    nextRow, nextCol = row, col
+                    break
+            if nextRow!=-1:
+                break
+        # without forward checking the domains only lost the values of the clues
+        conflict = 0
+        for val in initial_board.PossibleNum[nextRow][nextCol]:
+            consistencyChecks+=1
+            peer = findPeerWithValue(initial_board, nextRow, nextCol, val)
+            if peer != None:
+                childConflict = reasons[peer[0]*size+peer[1]]
+            else:
+                boardCopy = copy.deepcopy(initial_board)
+                boardCopy.set_value_no_forward_checking(nextRow, nextCol, val)
+                childReasons = reasons[:]
+                childReasons[nextRow*size+nextCol] = level
+                result, childConflict = backJump(boardCopy, forward_checking, MRV, MCV, LCV, childReasons, depth+1)
+                if result != False:
+                    return result, 0
+                if not childConflict & level:
+                    return False, childConflict
+            conflict |= childConflict & ~level
+        return False, conflict
+
+
+# helper function for backJump, returns {value: reason} for the values held by the tiles in the same row, column
+# and sub-box as [row, col] (leaving out the tiles in skip): for each value, the reason of the tile holding it that
+# was filled earliest, or with allPeers=True the reasons of all the tiles holding it
+def peerReasons(board, reasons, row, col, allPeers=False, skip=()):
+    size = board.BoardSize
+    result = {}
+    topRow = (row/board.squareSize)*board.squareSize
+    topCol = (col/board.squareSize)*board.squareSize
+    peers = [(i, col) for i in range(size)]+[(row, i) for i in range(size)]
+    peers += [(i, j) for i in range(topRow, topRow+board.squareSize) for j in range(topCol, topCol+board.squareSize)]
+    for i, j in peers:
+        value = board.CurrentGameBoard[i][j]
+        if value != 0 and (i, j) != (row, col) and (i, j) not in skip:
+            if allPeers:
+                result[value] = result.get(value, 0) | reasons[i*size+j]
+            elif value not in result or reasons[i*size+j] < result[value]:
+                result[value] = reasons[i*size+j]
+    return result
+
+
+# helper function for backJump, returns the bit mask of the decision levels that removed every value but the ones
+# in keep from the domain of [row, col]
+def removalReason(board, reasons, row, col, keep=()):
+    result = 0
+    for value, reason in peerReasons(board, reasons, row, col).items():
+        if value not in keep:
+            result |= reason
+    return result
+
+
+# helper function for backJump, returns the reasons after the decision at level assigned [row, col] on child (a
+# copy of parent). The tiles set_value filled by propagation each had all their other values removed by tiles
+# filled before them, so they are explained in an order like that: first the ones whose other values are all
+# held by tiles that were already filled on parent.
+def explainPropagation(parent, child, reasons, row, col, level):
+    size = parent.BoardSize
+    childReasons = reasons[:]
+    childReasons[row*size+col] = level
+    pending = set((i, j) for i in range(size) for j in range(size)
+                  if parent.CurrentGameBoard[i][j] == 0 and child.CurrentGameBoard[i][j] != 0)
+    pending.discard((row, col))
+    progress = True
+    while pending and progress:
+        progress = False
+        for i, j in list(pending):
+            held = peerReasons(child, childReasons, i, j, skip=pending)
+            value = child.CurrentGameBoard[i][j]
+            if len([other for other in held if other != value]) == size-1:
+                childReasons[i*size+j] = level
+                for other, reason in held.items():
+                    if other != value:
+                        childReasons[i*size+j] |= reason
+                pending.discard((i, j))
+                progress = True
+    # whatever couldn't be ordered (only if set_value stopped half way) blames every tile around it, repeated
+    # until nothing changes (the reasons only grow, so this stops)
+    for i, j in pending:
+        childReasons[i*size+j] = level
+    changed = bool(pending)
+    while changed:
+        changed = False
+        for i, j in pending:
+            reason = level
+            for other, peerReason in peerReasons(child, childReasons, i, j, True).items():
+                if other != child.CurrentGameBoard[i][j]:
+                    reason |= peerReason
+            if reason != childReasons[i*size+j]:
+                childReasons[i*size+j] = reason
+                changed = True
+    return childReasons
+
+
+# helper function for backJump, returns the levels that emptied the domain of an empty tile of the board. If no
+# tile was wiped out, every level up to depth is blamed, which makes the search backtrack chronologically.
+def wipeoutReason(board, reasons, depth):
+    for row in range(board.BoardSize):
+        for col in range(board.BoardSize):
+            if board.CurrentGameBoard[row][col] == 0 and not board.PossibleNum[row][col]:
+                return removalReason(board, reasons, row, col)
+    return (1 << depth)-1
+
+
+# helper function for backJump, returns [row, col] of a tile in the same row, column or sub-box as [row, col]
+# that holds val, or None if there is none
+def findPeerWithValue(board, row, col, val):
+    for i in range(board.BoardSize):
+        if board.CurrentGameBoard[i][col] == val:
+            return [i, col]
+        if board.CurrentGameBoard[row][i] == val:
+            return [row, i]
+    topRow = (row/board.squareSize)*board.squareSize
+    topCol = (col/board.squareSize)*board.squareSize
+    for i in range(topRow, topRow+board.squareSize):
+        for j in range(topCol, topCol+board.squareSize):
+            if board.CurrentGameBoard[i][j] == val:
+                return [i, j]
+    return None
+
+
+# helper function for backtrack, returns [row, col] of the next tile to assign (using MRV or MCV if asked for),
+# or False if an empty tile with no possible values was found on the way
+def selectUnassignedVariable(board, MRV, MCV):
+    size = board.BoardSize
+    nextRow = -1    # nextRow and nextCol hold the index of the next tile to be assigned
+    nextCol = -1
+
+    # if neither MRV nor MCV is used, use the first empty tile as next assignment
+    if not (MRV or MCV):
+        for row in range(size):
+            for col in range(size):
+                if board.CurrentGameBoard[row][col] == 0:
+                    if not board.PossibleNum[row][col]:
+                        return False
+                    else:
+                        nextRow, nextCol = row, col
+                        break
+            if nextRow!=-1:
+                break
+
+    # else if MRV is used, use the tile that has minimum remaining value as the next assignment
+    elif MRV:
+        currentMin = size+1   # the number of least remaining values seen so far
+        for row in range(size):
+            for col in range(size):
+                if board.CurrentGameBoard[row][col] == 0 and len(board.PossibleNum[row][col]) < currentMin:
+                    if not board.PossibleNum[row][col]:
+                        return False
+                    else:
+                        nextRow, nextCol = row, col
+
+    # else if MCV is used, use the tile that is is involved in the largest number of constraints with other unassigned variables as the next assignment
+    elif MCV:
+        currentMax = -1   # the number of most constraints seen so far
+        for row in range(size):
+            for col in range(size):
+                if board.CurrentGameBoard[row][col] == 0 and board.BoardConstraintsNum[row][col] > currentMax:
+                    if not board.PossibleNum[row][col]:
+                        return False
+                    else:
+                        nextRow, nextCol = row, col
+    return [nextRow, nextCol]
 
 
 # helper function for backtrack, returns the list of values to assign for a tile in the order of LCV
@@ -345,6 +858,14 @@ def orderDomainValues(board, rowAndColList):
     nextCol = rowAndColList[1]
     result = []
     valueDic = {}   # {value: constrainedNum}
+    if hasattr(board, 'RowValueCount'):
+        # the number of tiles in the row, column and sub-box that still allow the value is kept by the board
+        # (tiles in two of those units are counted twice, just like in the scan below)
+        nextBox = (nextRow/board.squareSize)*board.squareSize+nextCol/board.squareSize
+        for value in board.PossibleNum[nextRow][nextCol]:
+            valueDic[value] = board.RowValueCount[nextRow][value] + board.ColValueCount[nextCol][value] + board.BoxValueCount[nextBox][value]
+        return preferHint(board, nextRow, nextCol, sorted(valueDic.keys(), key=valueDic.__getitem__))
+
     for value in board.PossibleNum[nextRow][nextCol]:
         currentConstrained = 0  # ruled-out by the current value
         for i in range(0, size):
@@ -366,7 +887,19 @@ def orderDomainValues(board, rowAndColList):
 
     #sort valueDic based on constrainedNum
     result = sorted(valueDic.keys(), key=valueDic.__getitem__)
-    return result
+    return preferHint(board, nextRow, nextCol, result)
+
+
+# helper function for orderDomainValues: a board can carry a ValueHints grid (e.g. an earlier solution of the
+# puzzle, see SudokuIncremental); the hinted value of a tile is then tried before the others
+def preferHint(board, row, col, values):
+    if not hasattr(board, 'ValueHints'):
+        return values
+    hint = board.ValueHints[row][col]
+    if hint in values and values[0] != hint:
+        values.remove(hint)
+        values.insert(0, hint)
+    return values
 
 
 #sb=init_board("input_puzzles\\easy\\4_4.sudoku")
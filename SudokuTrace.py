@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Binary trace of a backTrack search, streamed to a file while solving, and tools to replay it offline.
+
+import struct, sys
+import SudokuStarter
+
+MAGIC = 'SDKT'
+VERSION = 1
+# magic, version, flags (bit 0: forward checking), board size
+HEADER = struct.Struct('<4sBBH')
+# outcome, depth, tile (row*N+col), value, domain size of the tile, possible numbers left on the whole board
+RECORD = struct.Struct('<BHHBBI')
+
+ASSIGNED = 0    # the value was placed (and propagated) without a conflict
+WIPEOUT = 1     # placing the value emptied the domain of a tile, or failed the consistency check
+FAILED = 2      # every value of the node's tile failed; the node returns False
+SOLUTION = 3    # the node's board is complete
+OUTCOMES = ['assigned', 'wipeout', 'failed', 'solution']
+
+
+class TraceWriter(object):
+    """Writes one RECORD per decision, failure and solution of a search to filename as they happen, so a trace
+    of any length costs no memory. The header holds the starting board, so the trace alone is enough to rebuild
+    any node of the search (see reconstruct)."""
+
+    def __init__(self, filename, board, forward_checking=True, bufferSize=1 << 16):
+        self.file = open(filename, 'wb', bufferSize)
+        self.size = board.BoardSize
+        self.records = 0
+        N = self.size
+        self.file.write(HEADER.pack(MAGIC, VERSION, 1 if forward_checking else 0, N))
+        self.file.write(bytearray(board.CurrentGameBoard[row][col] for row in range(N) for col in range(N)))
+        self.file.write(struct.pack('<%dh' % (N*N), *[board.BoardConstraintsNum[row][col]
+                                                       for row in range(N) for col in range(N)]))
+        possible = bytearray(N**3)
+        for row in range(N):
+            for col in range(N):
+                for value in board.PossibleNum[row][col]:
+                    possible[(row*N+col)*N+value-1] = 1
+        self.file.write(possible)
+
+    def _write(self, outcome, depth, tile, value, domainSize, candidates):
+        self.file.write(RECORD.pack(outcome, depth, tile, value, domainSize, candidates))
+        self.records += 1
+
+    def decision(self, depth, row, col, value, assigned, domainSize, board):
+        """Records trying value on (row, col) at depth; board is the board after the attempt."""
+        if hasattr(board, 'PossibleCount'):
+            # kept up to date by the SudokuBoard itself
+            candidates = board.PossibleCount
+        else:
+            candidates = sum(len(possible) for boardRow in board.PossibleNum for possible in boardRow)
+        self._write(ASSIGNED if assigned else WIPEOUT, depth, row*self.size+col, value, domainSize, candidates)
+
+    def failure(self, depth):
+        self._write(FAILED, depth, 0, 0, 0, 0)
+
+    def solution(self, depth):
+        self._write(SOLUTION, depth, 0, 0, 0, 0)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_header(f):
+    magic, version, flags, N = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a version %d sudoku trace" % VERSION)
+    values = bytearray(f.read(N*N))
+    constraints = struct.unpack('<%dh' % (N*N), f.read(2*N*N))
+    possible = bytearray(f.read(N**3))
+    board = SudokuStarter.SudokuBoard(N, [list(values[row*N:(row+1)*N]) for row in range(N)])
+    for row in range(N):
+        for col in range(N):
+            board.BoardConstraintsNum[row][col] = constraints[row*N+col]
+            base = (row*N+col)*N
+            board.PossibleNum[row][col] = [value for value in range(1, N+1) if possible[base+value-1]]
+    board.countPossibleNum()
+    return bool(flags & 1), board
+
+
+def read_trace(filename):
+    """Yields (forward_checking, starting SudokuBoard) and then one (outcome, depth, row, col, value, domain size,
+    candidates) tuple per record, reading the file as it goes."""
+    f = open(filename, 'rb')
+    try:
+        forward_checking, board = _read_header(f)
+        yield forward_checking, board
+        N = board.BoardSize
+        while True:
+            data = f.read(RECORD.size)
+            if len(data) < RECORD.size:
+                break
+            outcome, depth, tile, value, domainSize, candidates = RECORD.unpack(data)
+            yield outcome, depth, tile/N, tile % N, value, domainSize, candidates
+    finally:
+        f.close()
+
+
+def reconstruct(filename, index):
+    """Rebuilds the board of the search at record index: for a decision, the board right after its value was
+    tried; for a failure or solution, the board of that node. Heuristics can then be evaluated on any node
+    without running the search again."""
+    records = read_trace(filename)
+    forward_checking, board = next(records)
+    path = []
+    for i, (outcome, depth, row, col, value, domainSize, candidates) in enumerate(records):
+        del path[depth:]
+        if outcome in (ASSIGNED, WIPEOUT):
+            path.append((row, col, value))
+        if i == index:
+            break
+    else:
+        raise IndexError("the trace has no record %d" % index)
+    checks = SudokuStarter.consistencyChecks
+    for row, col, value in path:
+        if forward_checking:
+            board.set_value(row, col, value)
+        else:
+            board.set_value_no_forward_checking(row, col, value)
+    SudokuStarter.consistencyChecks = checks
+    return board
+
+
+def summarize(filename):
+    """Returns {depth: dict(nodes, decisions, wipeouts, failures, solutions, branching, domain)}: the nodes that
+    made decisions at each depth, what happened to them, the average number of values tried per node and the
+    average domain size of the tiles branched on."""
+    records = read_trace(filename)
+    next(records)
+    levels = {}
+    previous = None
+    for outcome, depth, row, col, value, domainSize, candidates in records:
+        level = levels.setdefault(depth, dict(nodes=0, decisions=0, wipeouts=0, failures=0, solutions=0, domain=0))
+        if outcome in (ASSIGNED, WIPEOUT):
+            # a node's first decision comes right after the decision of its parent (or first, for the root)
+            if previous is None or (previous[0] in (ASSIGNED, WIPEOUT) and previous[1] == depth-1):
+                level['nodes'] += 1
+            level['decisions'] += 1
+            level['wipeouts'] += outcome == WIPEOUT
+            level['domain'] += domainSize
+        elif outcome == FAILED:
+            level['failures'] += 1
+        else:
+            level['solutions'] += 1
+        previous = (outcome, depth)
+    for level in levels.values():
+        level['branching'] = float(level['decisions'])/level['nodes'] if level['nodes'] else 0.0
+        level['domain'] = float(level['domain'])/level['decisions'] if level['decisions'] else 0.0
+    return levels
+
+
+def print_summary(filename, out=sys.stdout):
+    levels = summarize(filename)
+    out.write("%5s %8s %10s %9s %9s %9s %9s %7s\n" % ("depth", "nodes", "decisions", "wipeouts", "failures",
+                                                     "solutions", "branching", "domain"))
+    for depth in sorted(levels):
+        out.write(("%5d " % depth)+("%(nodes)8d %(decisions)10d %(wipeouts)9d %(failures)9d %(solutions)9d "
+                                    "%(branching)9.2f %(domain)7.2f\n" % levels[depth]))
+
+
+if __name__ == '__main__':
+    # usage: SudokuTrace.py puzzle_file trace_file   records a trace of solve()
+    #        SudokuTrace.py trace_file               prints the per-depth summary of a trace
+    #        SudokuTrace.py trace_file index         prints the board at record index
+    if len(sys.argv) == 3 and not sys.argv[2].isdigit():
+        SudokuStarter.solve(SudokuStarter.init_board(sys.argv[1]), trace=sys.argv[2])
+    elif len(sys.argv) == 3:
+        reconstruct(sys.argv[1], int(sys.argv[2])).print_board()
+    else:
+        print_summary(sys.argv[1])
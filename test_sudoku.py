@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# EECS 348 PS3
+# Team name: XI
+# Team members: Jerry Li (jlt709) Alan Fu (yfo776)
+# Regression tests. Run with: python -m unittest test_sudoku
+
+import copy, glob, os, signal, tempfile, unittest
+import SudokuStarter, SudokuCompact, SudokuCheckpoint, SudokuIncremental
+from SudokuGenerator import board_from_clues
+
+PUZZLE = "input_puzzles/more/16x16/16x16.2.sudoku"
+
+
+class MemoryLimitTest(unittest.TestCase):
+
+    def solve(self, **options):
+        board = SudokuStarter.init_board(PUZZLE)
+        return SudokuStarter.solve_events(board, progressInterval=None, **options)
+
+    def first_solution(self, **options):
+        for kind, payload in self.solve(**options):
+            if kind == 'solution':
+                return payload
+        return None
+
+    def test_limit_between_compact_and_kernel_swaps_to_compact(self):
+        # 200 KB is too little for the kernel states of this puzzle but enough for CompactSudokuBoards
+        board = SudokuStarter.init_board(PUZZLE)
+        self.assertTrue(SudokuStarter.deepestStackBytes(board, True) > 200000)
+        solution = self.first_solution(memoryLimit=200000)
+        self.assertTrue(isinstance(solution, SudokuCompact.CompactSudokuBoard))
+        self.assertTrue(SudokuStarter.is_complete(solution))
+
+    def test_swap_works_with_probing(self):
+        solution = self.first_solution(memoryLimit=200000, probing=2)
+        self.assertTrue(SudokuStarter.is_complete(solution))
+
+    def test_swap_visits_the_same_nodes(self):
+        SudokuStarter.consistencyChecks = 0
+        expected = self.first_solution(kernels=False).CurrentGameBoard
+        checks = SudokuStarter.consistencyChecks
+        SudokuStarter.consistencyChecks = 0
+        solution = self.first_solution(memoryLimit=200000)
+        self.assertEqual([list(row) for row in solution.CurrentGameBoard], expected)
+        self.assertEqual(SudokuStarter.consistencyChecks, checks)
+
+    def test_limit_too_small_raises(self):
+        self.assertRaises(SudokuStarter.MemoryLimitExceeded, self.first_solution, memoryLimit=1000)
+
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.checkpoint = tempfile.mkstemp(suffix=".checkpoint")
+        os.close(handle)
+        os.remove(self.checkpoint)
+
+    def tearDown(self):
+        for fileName in [self.checkpoint, self.checkpoint+".tmp"]:
+            if os.path.exists(fileName):
+                os.remove(fileName)
+
+    def search(self):
+        SudokuStarter.consistencyChecks = 0
+        board = SudokuStarter.init_board(PUZZLE)
+        result = SudokuCheckpoint.resumable_backtrack(board, True, True, False, True, self.checkpoint, interval=0)
+        return [list(row) for row in result.CurrentGameBoard], SudokuStarter.consistencyChecks
+
+    @unittest.skipUnless(hasattr(os, 'kill') and SudokuCheckpoint.SAVE_SIGNAL is not None, "needs POSIX signals")
+    def test_interrupt_and_resume_gives_the_same_result(self):
+        expected = self.search()
+        self.assertFalse(os.path.exists(self.checkpoint))
+        isComplete = SudokuStarter.is_complete
+        calls = [0]
+
+        def interrupting(board):
+            calls[0] += 1
+            if calls[0] == 20:
+                os.kill(os.getpid(), signal.SIGINT)
+            return isComplete(board)
+        SudokuStarter.is_complete = interrupting
+        try:
+            self.assertRaises(SystemExit, self.search)
+        finally:
+            SudokuStarter.is_complete = isComplete
+        self.assertTrue(os.path.exists(self.checkpoint))
+        self.assertEqual(self.search(), expected)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_saving_over_an_old_checkpoint(self):
+        board = SudokuStarter.init_board(PUZZLE)
+        for i in range(2):
+            SudokuCheckpoint.save_checkpoint(self.checkpoint, board, (True, True, False, True), [], float(i))
+        self.assertEqual(SudokuCheckpoint.load_checkpoint(self.checkpoint)[4], 1.0)
+        self.assertFalse(os.path.exists(self.checkpoint+".tmp"))
+
+
+class ResolveTest(unittest.TestCase):
+    # edits of this puzzle's empty tiles that resolve handles in each of its ways
+    PUZZLE = "input_puzzles/more/9x9/9x9.12.sudoku"
+    REPAIRED = {(0, 3): 6}
+    FULL = {(1, 1): 2}
+    UNSOLVABLE = {(0, 1): 1}
+
+    def setUp(self):
+        self.size, self.clues = SudokuIncremental.read_clues(self.PUZZLE)
+        board = board_from_clues(self.size, self.clues)
+        self.solution = next(SudokuStarter.iter_solutions(board))
+
+    def assertSolves(self, board, clues):
+        self.assertTrue(SudokuStarter.is_complete(board))
+        for (row, col), value in clues.items():
+            self.assertEqual(board.CurrentGameBoard[row][col], value)
+
+    def test_removing_a_clue_keeps_the_solution(self):
+        tile = sorted(self.clues)[0]
+        clues, board, how = SudokuIncremental.resolve(self.solution, self.clues, {tile: 0})
+        self.assertEqual(how, 'kept')
+        self.assertTrue(board is self.solution)
+        self.assertFalse(tile in clues)
+
+    def test_conflicting_edit_is_repaired(self):
+        (tile, value), = self.REPAIRED.items()
+        self.assertNotEqual(self.solution.CurrentGameBoard[tile[0]][tile[1]], value)
+        clues, board, how = SudokuIncremental.resolve(self.solution, self.clues, self.REPAIRED)
+        self.assertEqual(how, 'repaired')
+        self.assertSolves(board, clues)
+
+    def test_edit_the_repair_cant_fix_is_solved_in_full(self):
+        clues, board, how = SudokuIncremental.resolve(self.solution, self.clues, self.FULL)
+        self.assertEqual(how, 'full')
+        self.assertSolves(board, clues)
+
+    def test_unsolvable_edit(self):
+        clues, board, how = SudokuIncremental.resolve(self.solution, self.clues, self.UNSOLVABLE)
+        self.assertEqual((board, how), (False, 'full'))
+
+
+class BackjumpingTest(unittest.TestCase):
+    # the bundled puzzles backTrack solves in well under a second
+    PUZZLES = (sorted(glob.glob("input_puzzles/easy/*.sudoku")) + sorted(glob.glob("input_puzzles/more/9x9/*.sudoku"))
+               + ["input_puzzles/more/16x16/16x16.%d.sudoku" % i for i in [1, 2, 3, 9, 11, 12, 13, 14, 17, 18]])
+    # (puzzle, tile, value): an extra clue that propagation doesn't rule out, but no search can complete
+    UNSOLVABLE = [("input_puzzles/more/9x9/9x9.12.sudoku", (0, 1), 1), ("input_puzzles/more/9x9/9x9.12.sudoku", (0, 1), 2),
+                  ("input_puzzles/more/9x9/9x9.1.sudoku", (0, 4), 5), ("input_puzzles/more/16x16/16x16.2.sudoku", (0, 1), 1)]
+
+    def assertSameResult(self, board):
+        expected = SudokuStarter.backTrack(copy.deepcopy(board), True, True, False, True)
+        result = SudokuStarter.backJump(copy.deepcopy(board), True, True, False, True)[0]
+        if expected == False:
+            self.assertEqual(result, False)
+        else:
+            self.assertNotEqual(result, False)
+            self.assertEqual(result.CurrentGameBoard, expected.CurrentGameBoard)
+
+    def test_same_solution_as_backtracking(self):
+        for fileName in self.PUZZLES:
+            self.assertSameResult(SudokuStarter.init_board(fileName))
+
+    def test_unsolvable_puzzles(self):
+        for fileName, tile, value in self.UNSOLVABLE:
+            size, clues = SudokuIncremental.read_clues(fileName)
+            clues[tile] = value
+            board = board_from_clues(size, clues)
+            self.assertNotEqual(board, None)
+            self.assertEqual(SudokuStarter.backTrack(copy.deepcopy(board), True, True, False, True), False)
+            self.assertSameResult(board)
+
+
+
+class KernelTest(unittest.TestCase):
+    PUZZLES_9 = sorted(glob.glob("input_puzzles/more/9x9/*.sudoku"))
+    PUZZLES_16 = ["input_puzzles/more/16x16/16x16.%d.sudoku" % i for i in [1, 2, 3, 9, 11, 12, 13, 14, 17, 18]]
+
+    def search(self, fileName, options, kernels):
+        SudokuStarter.consistencyChecks = 0
+        board = SudokuStarter.init_board(fileName)
+        for kind, payload in SudokuStarter.solve_events(board, *options, kernels=kernels, progressInterval=None):
+            if kind == 'solution':
+                return [list(row) for row in payload.CurrentGameBoard], SudokuStarter.consistencyChecks
+        return None, SudokuStarter.consistencyChecks
+
+    def assertSameSearch(self, fileNames, options):
+        for fileName in fileNames:
+            self.assertEqual(self.search(fileName, options, True), self.search(fileName, options, False),
+                             "%s %r" % (fileName, options))
+
+    def test_mrv_and_mcv(self):
+        for options in [(True, True, False, True), (True, False, True, False)]:
+            self.assertSameSearch(self.PUZZLES_9+self.PUZZLES_16, options)
+
+    def test_first_empty_tile(self):
+        # without MRV or MCV the searches are only quick enough on the 9x9 puzzles
+        for options in [(True, False, False, True), (True, False, False, False), (False, False, False, False)]:
+            self.assertSameSearch(self.PUZZLES_9, options)
+
+
+if __name__ == '__main__':
+    unittest.main()